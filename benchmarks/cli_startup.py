@@ -0,0 +1,103 @@
+"""
+Compares CLI startup time of eager command registration (`cli.Command`, every command module is imported) with
+deferred registration by import path (`cli.add_command`, only the selected command module is imported).
+
+Usage: python benchmarks/cli_startup.py [--commands 40] [--import-cost 0.02] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMMAND_MODULE = '''
+import time
+from components import Component
+from cli_bench_app import cli
+
+# simulate heavy dependencies
+time.sleep({import_cost})
+
+
+class Command{index}(Component, cli.Command):
+    """ Benchmark command {index}. """
+    def __init__(self, par: int = 1, ratio: float = 0.5):
+        self.par = par
+        self.ratio = ratio
+
+    def run(self):
+        pass
+'''
+
+APP_MODULE = '''
+from components.cli import CLI
+
+cli = CLI()
+'''
+
+EAGER_SCRIPT = '''
+from cli_bench_app import cli
+{imports}
+
+if __name__ == "__main__":
+    cli()
+'''
+
+LAZY_SCRIPT = '''
+from cli_bench_app import cli
+{registrations}
+
+if __name__ == "__main__":
+    cli()
+'''
+
+
+def write_app(directory, commands, import_cost):
+    with open(os.path.join(directory, "cli_bench_app.py"), "w") as f:
+        f.write(APP_MODULE)
+    for index in range(commands):
+        with open(os.path.join(directory, f"cli_bench_cmd{index}.py"), "w") as f:
+            f.write(COMMAND_MODULE.format(index=index, import_cost=import_cost))
+
+    imports = "\n".join(f"import cli_bench_cmd{index}" for index in range(commands))
+    with open(os.path.join(directory, "eager.py"), "w") as f:
+        f.write(EAGER_SCRIPT.format(imports=imports))
+
+    registrations = "\n".join(f'cli.add_command("cli_bench_cmd{index}.Command{index}", help="Benchmark command.")'
+                              for index in range(commands))
+    with open(os.path.join(directory, "lazy.py"), "w") as f:
+        f.write(LAZY_SCRIPT.format(registrations=registrations))
+
+
+def measure(directory, script, args, repeat):
+    env = dict(os.environ)
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join([directory, repo, env.get("PYTHONPATH", "")])
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(directory, script)] + args, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=40, help="number of registered commands")
+    parser.add_argument("--import-cost", type=float, default=0.02, help="seconds spent importing a command module")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_app(directory, args.commands, args.import_cost)
+        for label, cmd_args in [("help", ["-h"]), ("run", ["Command0", "--par", "3"])]:
+            for script in ["eager.py", "lazy.py"]:
+                times = measure(directory, script, cmd_args, args.repeat)
+                print(f"{label:5s} {script[:-3]:6s} min {min(times):.3f}s  median {statistics.median(times):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Checkpoints of fitted components across runs.
+
+    class Algorithm(Component):
+        @fitted
+        def fit(self, x):
+            self.cutoff_ = sum(x) / len(x)
+            return self
+
+    with ArtifactCache(".artifacts", types=[Algorithm], upstream=[DataSource], max_bytes=2 ** 30):
+        experiment = Experiment.resolve()
+    experiment.run()
+
+While an `ArtifactCache` is active, every resolved component with a type in `types` gets a key: its configuration
+plus the fingerprints of the components with a type in `upstream` (e.g. the data it is fitted on) in the same resolve.
+A fingerprint is the configuration of a component and the result of its `fingerprint()` method, if it has one (e.g.
+the modification time of its file). After a call to a `fitted` method, the fitted state and the return value are
+stored under that key and the arguments of the call. A later call with the same key and arguments restores the state
+and returns the stored value instead of fitting again. When a component is resolved, the state of its last fit is
+restored, so it can be used without calling the `fitted` method.
+Keys are built with `stable_key`: components and arguments without a stable representation are not checkpointed.
+"""
+import functools
+import hashlib
+import json
+import pickle
+import threading
+
+from components.hooks import ResolveObserver
+from components.result_cache import ResultCache, stable_key
+
+
+class _Self(object):
+    """ Stored in place of a return value that is the fitted component itself. """
+
+
+def get_fitted_state(obj):
+    """
+    Returns the fitted state of `obj`: the result of its `get_fitted_state()` method if it has one, otherwise its
+    public attributes that end with an underscore (e.g. `cutoff_`).
+    """
+    if hasattr(obj, 'get_fitted_state'):
+        return obj.get_fitted_state()
+    return {name: value for name, value in vars(obj).items() if name.endswith('_') and not name.startswith('_')}
+
+
+def set_fitted_state(obj, state):
+    """ Restores the state returned by `get_fitted_state`. """
+    if hasattr(obj, 'set_fitted_state'):
+        obj.set_fitted_state(state)
+        return
+    for name, value in state.items():
+        setattr(obj, name, value)
+
+
+def fingerprint(obj):
+    """ Fingerprint of an upstream component: its configuration and the result of its `fingerprint()` method. """
+    method = getattr(obj, 'fingerprint', None)
+    return stable_key([obj, method() if callable(method) else None])
+
+
+def _hash(description):
+    return hashlib.sha256(json.dumps(description).encode()).hexdigest()
+
+
+def _no_checkpoint():
+    return None
+
+
+class _Checkpoint(object):
+    """ Artifact key of a resolved component. Pickled as None, so copies (e.g. in other processes) aren't stored. """
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+
+    def __reduce__(self):
+        return _no_checkpoint, ()
+
+
+def fitted(method):
+    """
+    Decorator of fit-like methods. With a checkpoint (see `ArtifactCache`), the fitted state and return value are stored
+    after the call, and a call with the same arguments restores them instead.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        checkpoint = vars(self).get('_checkpoint')
+        if checkpoint is None:
+            return method(self, *args, **kwargs)
+        try:
+            key = checkpoint.cache.fit_key(checkpoint.key, method.__name__, args, kwargs)
+        except TypeError:
+            # arguments without a stable representation
+            return method(self, *args, **kwargs)
+        found, result = checkpoint.cache.restore(self, key)
+        if found:
+            return result
+        result = method(self, *args, **kwargs)
+        checkpoint.cache.store(self, checkpoint.key, key, result)
+        return result
+
+    return wrapper
+
+
+class ArtifactCache(ResolveObserver):
+    """
+    Stores and restores the fitted state of components of `types`, see `components.artifacts`.
+    Storage is a `ResultCache` in `directory`: with `max_bytes`, the least recently used states are removed when the
+    total size exceeds it. Activate with `with` (in this thread) or `install()` (in all threads).
+    `restored` counts the components whose state was restored on resolve, `skipped` the fits that were skipped and
+    `stored` the fits that were stored.
+    """
+
+    def __init__(self, directory, types=(), upstream=(), max_bytes=None, salt=""):
+        self.storage = ResultCache(directory, max_bytes=max_bytes)
+        self.types = tuple(types)
+        self.upstream = tuple(upstream)
+        self.salt = salt
+        self.restored = 0
+        self.skipped = 0
+        self.stored = 0
+        # stack of the components constructed per (nested) resolve, per thread
+        self._local = threading.local()
+
+    def on_enter(self, cls, path):
+        if not path:
+            resolves = getattr(self._local, 'resolves', None)
+            if resolves is None:
+                resolves = self._local.resolves = list()
+            resolves.append(list())
+
+    def on_constructed(self, cls, path, obj):
+        resolves = getattr(self._local, 'resolves', None)
+        if obj is not None and resolves:
+            resolves[-1].append(obj)
+
+    def on_exit(self, cls, path, obj):
+        if path:
+            return
+        constructed = self._local.resolves.pop()
+        if obj is None:
+            return
+        try:
+            upstream = [fingerprint(c) for c in constructed if isinstance(c, self.upstream)] if self.upstream else []
+        except TypeError:
+            # the data can't be identified, so nothing can be checkpointed
+            return
+        for component in constructed:
+            if isinstance(component, self.types):
+                self.checkpoint(component, upstream)
+
+    def key(self, obj, upstream=()):
+        """
+        Key of the fitted state of `obj` with the fingerprints of its upstream components.
+        Raises a TypeError if `obj` has no stable representation.
+        """
+        return _hash(stable_key([obj, sorted(json.dumps(u) for u in upstream), self.salt]))
+
+    def fit_key(self, key, name, args, kwargs):
+        """ Key of a call to fit method `name` of the component with `key`. Raises a TypeError as `stable_key`. """
+        return _hash([key, name, stable_key([list(args), kwargs])])
+
+    def checkpoint(self, obj, upstream=()):
+        """
+        Attaches the key of `obj`, so `fitted` methods store and restore its state, and restores the state of its last
+        fit if it is stored. Returns whether the state was restored.
+        """
+        try:
+            key = self.key(obj, upstream)
+        except TypeError:
+            return False
+        # not a parameter, so it isn't part of the configuration
+        vars(obj)['_checkpoint'] = _Checkpoint(self, key)
+        found, fit_key = self.storage.get(key)
+        if found and self._load(obj, fit_key)[0]:
+            self.restored += 1
+            return True
+        return False
+
+    def _load(self, obj, fit_key):
+        """ Restores the state of the fit with `fit_key`. Returns (True, return value of the fit) or (False, None). """
+        found, stored = self.storage.get(fit_key)
+        if not found:
+            return False, None
+        state, result = stored
+        set_fitted_state(obj, state)
+        return True, obj if isinstance(result, _Self) else result
+
+    def restore(self, obj, fit_key):
+        """ Restores the state of the fit with `fit_key`, so it can be skipped. Returns the same as `_load`. """
+        found, result = self._load(obj, fit_key)
+        if found:
+            self.skipped += 1
+        return found, result
+
+    def store(self, obj, key, fit_key, result):
+        """
+        Stores the fitted state of `obj` and the `result` of the fit with `fit_key`, as last fit of the component with
+        `key`. Results that can't be pickled aren't stored.
+        """
+        try:
+            self.storage.put(fit_key, (get_fitted_state(obj), _Self() if result is obj else result))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        self.storage.put(key, fit_key)
+        self.stored += 1
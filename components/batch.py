@@ -0,0 +1,162 @@
+"""
+Batch mode for the CLI: executes many invocations from one process.
+Every input line is either a command line ("Experiment --ratio 0.5") or a JSON object
+({"command": "Experiment", "ratio": 0.5}). One JSON result record is written per input line.
+"""
+import contextlib
+import io
+import json
+import multiprocessing
+import multiprocessing.pool
+import shlex
+import sys
+import time
+import traceback
+
+# name of the batch subcommand
+BATCH = "batch"
+
+# CLI used by the worker processes, inherited when forking
+_cli = None
+
+
+def job_argv(line, default_command=None, commands=()):
+    """
+    Converts an input line into command line arguments. Returns None for empty lines and comments, raises a ValueError
+    for malformed JSON. JSON values that aren't strings are passed as JSON (e.g. lists and dicts).
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        obj = json.loads(line)
+        if not isinstance(obj, dict):
+            raise ValueError("Expected a JSON object")
+        command = obj.pop('command', default_command)
+        argv = [] if command is None else [command]
+        for name, value in obj.items():
+            option = ("-" if len(name) == 1 else "--") + name.replace('_', '-')
+            if value is True:
+                argv.append(option)
+            elif value is False:
+                argv.append(f"--no-{option.lstrip('-')}")
+            else:
+                argv += [option, value if isinstance(value, str) else json.dumps(value)]
+        return argv
+    argv = shlex.split(line)
+    if default_command is not None and (len(argv) == 0 or argv[0] not in commands):
+        argv = [default_command] + argv
+    return argv
+
+
+def _json_value(value):
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def run_job(cli, index, argv, error=None):
+    """ Parses, resolves and runs one invocation. Returns its result record, an error record if `error` is given. """
+    record = {'line': index, 'argv': argv}
+    if error is not None:
+        record.update(status="error", error=error, time=0.0, stdout="", stderr="")
+        return record
+    stdout, stderr = io.StringIO(), io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            cls, kwargs = cli.parse_args(argv)
+            record['command'] = cls.__name__
+            obj = cls.resolve(**kwargs)
+            record['result'] = _json_value(obj.run())
+            record['status'] = "ok"
+        except SystemExit as e:
+            # invalid arguments, message is written to stderr by argparse
+            record['status'] = "ok" if not e.code else "error"
+            record['error'] = "invalid arguments"
+        except Exception as e:
+            record['status'] = "error"
+            record['error'] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+    record['time'] = time.perf_counter() - start
+    record['stdout'] = stdout.getvalue()
+    record['stderr'] = stderr.getvalue()
+    return record
+
+
+def _run_job(job):
+    return run_job(_cli, *job)
+
+
+def read_jobs(lines, default_command=None, commands=()):
+    """
+    Yields (line number, argv, error) for every invocation in `lines`. Lines that can't be parsed are yielded with
+    argv None and the error message, so the remaining lines are still run.
+    """
+    for index, line in enumerate(lines, 1):
+        try:
+            argv = job_argv(line, default_command, commands)
+        except ValueError as e:
+            yield index, None, f"invalid line: {e}"
+            continue
+        if argv is not None:
+            yield index, argv, None
+
+
+def run_batch(cli, input="-", output="-", workers=0, default_command=None):
+    """
+    Runs all invocations in file `input` ("-" for stdin) and writes JSONL result records to `output` ("-" for
+    stdout), in input order. With `workers` > 0, invocations are executed by a pool of (forked) worker processes.
+    Returns the number of failed invocations.
+    """
+    global _cli
+    in_file = sys.stdin if input == "-" else open(input)
+    out_file = sys.stdout if output == "-" else open(output, "w")
+    failed = 0
+    try:
+        jobs = read_jobs(in_file, default_command, cli.command_names())
+        if workers > 0:
+            # build the parsers and plans once, so workers inherit them
+            cli.setup_all()
+            _cli = cli
+            if 'fork' in multiprocessing.get_all_start_methods():
+                pool = multiprocessing.get_context('fork').Pool(workers)
+            else:
+                pool = multiprocessing.pool.ThreadPool(workers)
+            with pool:
+                records = pool.imap(_run_job, jobs)
+                failed = _write_records(records, out_file)
+        else:
+            records = (run_job(cli, *job) for job in jobs)
+            failed = _write_records(records, out_file)
+    finally:
+        _cli = None
+        if in_file is not sys.stdin:
+            in_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
+    return failed
+
+
+def _write_records(records, out_file):
+    failed = 0
+    for record in records:
+        failed += record['status'] != "ok"
+        out_file.write(json.dumps(record) + "\n")
+        out_file.flush()
+    return failed
+
+
+def add_parser(subparsers):
+    """ Adds the batch subcommand to the subparsers of a CLI. """
+    parser = subparsers.add_parser(BATCH, help="Run many invocations (command lines or JSON objects) from a file.",
+                                   description=__doc__)
+    parser.add_argument('input', nargs='?', default="-", help="file with one invocation per line (default: stdin)")
+    parser.add_argument('-o', '--output', default="-", help="file for the JSONL result records (default: stdout)")
+    parser.add_argument('-w', '--workers', type=int, default=0,
+                        help="number of worker processes, 0 runs all invocations in this process (default: 0)")
+    parser.add_argument('-c', '--command', dest='default_command', default=None,
+                        help="command for lines that don't start with a command name")
+    return parser
@@ -0,0 +1,82 @@
+"""
+Benchmarking of commands: times `resolve` and `run()` separately over a number of repetitions.
+"""
+import json
+import math
+import statistics
+import sys
+import time
+
+
+def summarize(times):
+    """ Returns min, median, p95, mean and all times (in seconds). """
+    ordered = sorted(times)
+    if len(ordered) == 0:
+        return {'count': 0}
+    # nearest-rank percentile
+    p95 = ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+    return {
+        'count': len(ordered),
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'p95': p95,
+        'mean': statistics.mean(ordered),
+        'times': list(times),
+    }
+
+
+def benchmark(cls, params, warmup=1, repeat=5, reuse=False):
+    """
+    Times `cls.resolve(**params)` and `run()` of the resolved object.
+    The first `warmup` repetitions are not measured. With `reuse`, the object is resolved once and only `run()` is
+    repeated. Returns a dict with the statistics of both phases.
+    """
+    resolve_times = list()
+    run_times = list()
+    obj = None
+    for i in range(warmup + repeat):
+        if obj is None or not reuse:
+            start = time.perf_counter()
+            obj = cls.resolve(**dict(params))
+            resolve_time = time.perf_counter() - start
+            if i >= warmup or (reuse and not resolve_times):
+                resolve_times.append(resolve_time)
+        start = time.perf_counter()
+        obj.run()
+        run_time = time.perf_counter() - start
+        if i >= warmup:
+            run_times.append(run_time)
+
+    return {
+        'command': cls.__name__,
+        'params': {k: repr(v) for k, v in params.items()},
+        'warmup': warmup,
+        'repeat': repeat,
+        'reuse': reuse,
+        'resolve': summarize(resolve_times),
+        'run': summarize(run_times),
+    }
+
+
+def report(stats, file=None):
+    """ Prints a short human readable summary of benchmark statistics. """
+    file = sys.stderr if file is None else file
+    print(f"benchmark {stats['command']} (warmup {stats['warmup']}, repeat {stats['repeat']}"
+          f"{', reused instance' if stats['reuse'] else ''}):", file=file)
+    for phase in ('resolve', 'run'):
+        s = stats[phase]
+        if not s['count']:
+            print(f"  {phase:8s} not measured", file=file)
+            continue
+        print(f"  {phase:8s} min {s['min']:.6f}s  median {s['median']:.6f}s  p95 {s['p95']:.6f}s  (n={s['count']})",
+              file=file)
+
+
+def write(stats, path):
+    """ Writes the statistics as JSON to `path` ("-" for stdout). """
+    if path == "-":
+        json.dump(stats, sys.stdout, indent=2)
+        print()
+    else:
+        with open(path, "w") as f:
+            json.dump(stats, f, indent=2)
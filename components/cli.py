@@ -1,8 +1,23 @@
 from abc import ABC, abstractmethod
 import argparse
+import importlib
 import inspect
+import sys
 
 from components import Component
+from components import batch, benchmark, coercion, completion, profiling
+from components.completion import SCRIPTS
+from components.spec_cache import SpecCache, class_path
+
+
+def _count(minimum):
+    """ Argument type of integer options with a minimum value. """
+    def count(value):
+        value = int(value)
+        if value < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {value}")
+        return value
+    return count
 
 
 class MyHelpFormatter(argparse.ArgumentDefaultsHelpFormatter):
@@ -19,9 +34,30 @@ class MyHelpFormatter(argparse.ArgumentDefaultsHelpFormatter):
         return action.type.__name__
 
 
+class _CompletionAction(argparse.Action):
+    """ Prints a shell completion script and exits. """
+
+    def __init__(self, cli, **kwargs):
+        super().__init__(**kwargs)
+        self.cli = cli
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print(self.cli.completion_script(values), end="")
+        parser.exit()
+
+
 class CLI:
-    def __init__(self, description=""):
+    def __init__(self, description="", spec_cache=None):
+        """
+        `spec_cache` is an optional path to a file that caches the argument specs of the commands, so their parsers
+        (and help) can be built without importing or resolving them.
+        """
         self.commands = dict()
+        self.spec_cache = None if spec_cache is None else SpecCache(spec_cache)
+        # commands registered by import path, which are only imported when selected: name -> (path, help)
+        self.lazy_commands = dict()
+        # names of the commands whose subparser contains all arguments
+        self.configured_commands = set()
         self.parser = argparse.ArgumentParser(description=description)
         self.subparsers = self.parser.add_subparsers(
             help="Select one of the following subcommands:",
@@ -29,17 +65,106 @@ class CLI:
             metavar="subcommand"
         )
         self.subparsers.required = True
+        self.parser.add_argument('--completion', choices=sorted(SCRIPTS), action=_CompletionAction, cli=self,
+                                 default=argparse.SUPPRESS, help="print a static shell completion script and exit")
+        # destinations of the options that apply to every command
+        self.global_options = set()
+        self.setup_global_options()
 
     def __call__(self):
         self.run()
 
-    def run(self):
-        if len(self.commands) > 0:
-            self.setup()
-            cls, kwargs = self.parse_args()
+    def run(self, argv=None):
+        """ Runs the command selected by `argv` (default: `sys.argv[1:]`). """
+        if len(self.commands) > 0 or len(self.lazy_commands) > 0:
+            argv = sys.argv[1:] if argv is None else list(argv)
+            if self.is_batch(self.selected_command(argv)):
+                self.setup()
+                args = self.parser.parse_args(argv)
+                failed = batch.run_batch(self, args.input, args.output, args.workers, args.default_command)
+                if failed:
+                    # exit status for scripts, the errors are in the records
+                    sys.exit(1)
+                return
+            cls, kwargs, options = self.parse(argv)
+            if options['benchmark']:
+                stats = benchmark.benchmark(cls, kwargs, warmup=options['warmup'], repeat=options['repeat'],
+                                            reuse=options['reuse'])
+                benchmark.report(stats)
+                if options['benchmark_output'] is not None:
+                    benchmark.write(stats, options['benchmark_output'])
+                return
+            if options['profile']:
+                stats = profiling.profile_command(cls, kwargs)
+                profiling.report(stats, options['profile_output'], options['profile_top'], options['profile_sort'])
+                return
             obj = cls.resolve(**kwargs)
             obj.run()
 
+    def setup_global_options(self):
+        """ Adds the options that apply to every command. They should be given before the command name. """
+        group = self.parser.add_argument_group('benchmark')
+        self.add_global_option(group, '--benchmark', action='store_true',
+                               help="time resolve and run of the command instead of running it once")
+        self.add_global_option(group, '--warmup', type=_count(0), default=1, metavar="int",
+                               help="number of unmeasured repetitions (default: %(default)s)")
+        self.add_global_option(group, '--repeat', type=_count(1), default=5, metavar="int",
+                               help="number of measured repetitions (default: %(default)s)")
+        self.add_global_option(group, '--reuse', action='store_true',
+                               help="resolve the command once and only repeat run")
+        self.add_global_option(group, '--benchmark-output', default=None, metavar="path",
+                               help="write the statistics as JSON to this file ('-' for stdout)")
+
+        group = self.parser.add_argument_group('profile')
+        self.add_global_option(group, '--profile', action='store_true',
+                               help="profile resolve and run of the command with cProfile")
+        self.add_global_option(group, '--profile-output', default=None, metavar="prefix",
+                               help="write <prefix>.resolve.prof and <prefix>.run.prof")
+        self.add_global_option(group, '--profile-top', type=int, default=20, metavar="int",
+                               help="number of entries in the summary (default: %(default)s)")
+        self.add_global_option(group, '--profile-sort', default='cumulative', metavar="key",
+                               choices=['cumulative', 'tottime', 'calls', 'component'],
+                               help="sort key of the summary, 'component' aggregates per Component class "
+                                    "(default: %(default)s)")
+
+    def add_global_option(self, group, name, **kwargs):
+        """ Adds a global option, with a destination that can't conflict with the parameters of commands. """
+        dest = "cli." + name.lstrip('-').replace('-', '_')
+        self.global_options.add(dest)
+        group.add_argument(name, dest=dest, **kwargs)
+
+    def serve(self, socket_path, shared=(), max_instances=128):
+        """
+        Runs this CLI as a daemon listening on a Unix socket. Commands are executed in this (warm) process.
+        Components with a type in `shared` are reused across invocations with the same configuration, at most
+        `max_instances` of them.
+        Use `python -m components.daemon <socket_path> <command> [args]` as client.
+        """
+        from components.daemon import Daemon
+        with Daemon(self, socket_path, shared=shared, max_instances=max_instances) as daemon:
+            daemon.serve_forever()
+
+    def add_command(self, path, help=None, name=None):
+        """
+        Registers a command by its import path ("package.module.Class" or "package.module:Class"), without importing
+        it. The module is only imported when the command is selected. `help` is shown in the subcommand listing.
+        """
+        if name is None:
+            name = path.replace(':', '.').rsplit('.', 1)[-1]
+        self.lazy_commands[name] = (path, help)
+
+    def get_command(self, name):
+        """ Returns the command class with this name, importing it first if it was registered by path. """
+        if name not in self.commands and name in self.lazy_commands:
+            path, _ = self.lazy_commands[name]
+            module_name, _, cls_name = path.rpartition(':') if ':' in path else path.rpartition('.')
+            cls = getattr(importlib.import_module(module_name), cls_name)
+            if not (isinstance(cls, type) and issubclass(cls, Component)):
+                raise TypeError(f"Command {path} should be a Component")
+            # importing can already register the class as `cli.Command`
+            self.commands[name] = cls
+        return self.commands[name]
+
     @property
     def Command(self):
         class Command(ABC):
@@ -59,16 +184,105 @@ class CLI:
         return Command
 
     def setup(self):
-        for cls in self.commands.values():
-            self.setup_command(cls)
-
-    def setup_command(self, cls):
-        sub_parser = self.subparsers.add_parser(
-            cls.__name__,
-            help=cls.__doc__,
-            description=cls.__doc__,
-            formatter_class=MyHelpFormatter
-        )
+        """
+        Adds a subparser for every command, without arguments.
+        The arguments of a command are only added when it is selected, see `setup_command`.
+        """
+        helps = {name: cls.__doc__ for name, cls in self.commands.items()}
+        for name, (_, help) in self.lazy_commands.items():
+            helps.setdefault(name, help)
+        for name, help in helps.items():
+            # skip commands that were already set up
+            if name not in self.subparsers.choices:
+                self.subparsers.add_parser(
+                    name,
+                    help=help,
+                    description=help,
+                    formatter_class=MyHelpFormatter
+                )
+        if self.is_batch(batch.BATCH) and batch.BATCH not in self.subparsers.choices:
+            batch.add_parser(self.subparsers)
+
+    def setup_all(self):
+        """ Sets up the subparsers of all commands with their arguments. """
+        for name in self.command_names():
+            self.setup_command_by_name(name)
+
+    def command_names(self):
+        """ Names of all registered commands, including the ones registered by import path. """
+        return list(dict.fromkeys(list(self.lazy_commands) + list(self.commands)))
+
+    def setup_command_by_name(self, name):
+        """
+        Adds the arguments of command `name` to its subparser.
+        Uses the spec cache when it is up to date, so lazy commands don't have to be imported.
+        """
+        if name in self.configured_commands:
+            return
+        spec, doc = self.get_spec(name)
+        self.add_arguments(name, spec, doc)
+
+    def setup_command(self, cls, name=None):
+        """ Adds the arguments of command `cls` to its subparser. """
+        name = cls.__name__ if name is None else name
+        if name in self.configured_commands:
+            return
+        spec = self.command_spec(cls)
+        if self.spec_cache is not None:
+            self.spec_cache.put(name, cls, spec)
+        self.add_arguments(name, spec, cls.__doc__)
+
+    def get_spec(self, name):
+        """ Returns the argument spec and docstring of command `name`, from the spec cache when it is up to date. """
+        if self.spec_cache is not None:
+            entry = self.spec_cache.get(name, self.command_path(name))
+            if entry is not None:
+                return entry['spec'], entry['doc']
+        cls = self.get_command(name)
+        spec = self.command_spec(cls)
+        if self.spec_cache is not None:
+            self.spec_cache.put(name, cls, spec)
+        return spec, cls.__doc__
+
+    def command_path(self, name):
+        """ Import path of command `name`. """
+        if name in self.commands:
+            return class_path(self.commands[name])
+        return self.lazy_commands[name][0].replace(':', '.')
+
+    @staticmethod
+    def command_spec(cls):
+        """
+        Returns the argument spec of command `cls`: a list with a dict per (flattened) parameter with its option
+        `names`, `dest`, `type`, whether it is `required` and otherwise its `default`.
+        """
+        def format_name(name):
+            param_name = name.replace('_', '-')
+            prefix = "-" if len(param_name) == 1 else "--"
+            return prefix + param_name
+
+        spec = list()
+        for param in sum((param.flatten() for param in cls.get_plan()), []):
+            required = param.default is inspect.Parameter.empty
+            names = [format_name(alias) for alias in sorted(param.aliases, key=len) if not (alias.startswith('_'))]
+            argument = {
+                'names': names,
+                'dest': param.full_name,
+                'type': param.type,
+                'required': required,
+            }
+            if not required:
+                argument['default'] = param.default
+            spec.append(argument)
+        return spec
+
+    def add_arguments(self, name, spec, doc=None):
+        """ Adds the arguments in `spec` (see `command_spec`) to the subparser of command `name`. """
+        self.setup()
+        self.configured_commands.add(name)
+        sub_parser = self.subparsers.choices[name]
+        if doc:
+            sub_parser.description = doc
 
         def add_bool_param(parser, *names, dest, default):
             """
@@ -86,38 +300,92 @@ class CLI:
             if default is not None:
                 group.set_defaults(**{dest: default})
 
-        def format_name(name):
-            param_name = name.replace('_', '-')
-            prefix = "-" if len(param_name) == 1 else "--"
-            return prefix + param_name
-
         required_arguments = sub_parser.add_argument_group('required arguments')
-        for param in cls.get_requested_params(flatten=True):
-            required = param.default is inspect.Parameter.empty
-            names = [format_name(alias) for alias in sorted(param.aliases, key=len) if not (alias.startswith('_'))]
+        for argument in spec:
+            required = argument['required']
+            names = argument['names']
             if required:
                 p = required_arguments
             else:
                 p = sub_parser
 
-            if param.type == bool:
-                add_bool_param(p, *names, dest=param.full_name, default=None if required else param.default)
+            if argument['type'] == bool:
+                add_bool_param(p, *names, dest=argument['dest'], default=None if required else argument['default'])
             else:
                 conditional_kwargs = dict()
                 if not required:
-                    conditional_kwargs['default'] = param.default
+                    conditional_kwargs['default'] = argument['default']
                     conditional_kwargs['help'] = "(default: %(default)s)"
+                optional = not required and argument['default'] is None
                 p.add_argument(*names,
-                               type=param.type,
-                               dest=param.full_name,
+                               type=coercion.compile_converter(argument['type'], optional=optional),
+                               dest=argument['dest'],
                                required=required,
                                **conditional_kwargs)
 
-    def parse_args(self):
-        cmd_args = self.parser.parse_args()
-        fName = cmd_args.command
-        cls = self.commands[fName]
+    def completion_script(self, shell="bash", prog=None):
+        """
+        Returns a static completion script for `shell` ("bash" or "zsh"), generated from the argument specs of all
+        commands. `prog` is the name of the program to complete (default: the parser's prog).
+        """
+        prog = self.parser.prog if prog is None else prog
+        commands = [(name,) + self.get_spec(name)[::-1] for name in self.command_names()]
+        builtins = [batch.BATCH] if self.is_batch(batch.BATCH) else []
+        options = [option for action in self.parser._actions for option in action.option_strings]
+        value_options = [option for action in self.parser._actions if action.nargs != 0
+                         for option in action.option_strings]
+        return SCRIPTS[shell](prog, commands, builtins, options, value_options)
+
+    def write_completion(self, path, shell="bash", prog=None):
+        """ Writes the completion script to `path` if the specs changed. Returns whether the file was written. """
+        script = self.completion_script(shell, prog)
+        try:
+            with open(path) as f:
+                if completion.header(f) == completion.header(script.split("\n")):
+                    return False
+        except OSError:
+            pass
+        with open(path, "w") as f:
+            f.write(script)
+        return True
 
-        kwargs = {n: v for n, v in cmd_args._get_kwargs() if n != "command"}
+    def selected_command(self, argv):
+        """ Returns the name of the command selected in `argv` or None. """
+        takes_value = False
+        for arg in argv:
+            if takes_value:
+                # value of a global option
+                takes_value = False
+                continue
+            if arg in self.commands or arg in self.lazy_commands or self.is_batch(arg):
+                return arg
+            if not arg.startswith('-'):
+                return None
+            action = self.parser._option_string_actions.get(arg)
+            takes_value = action is not None and action.nargs != 0
+        return None
 
+    def is_batch(self, name):
+        """ Whether `name` selects the built-in batch subcommand (unless a command has the same name). """
+        return name == batch.BATCH and name not in self.commands and name not in self.lazy_commands
+
+    def parse_args(self, argv=None):
+        """ Returns the selected command and the parameters for its `resolve`. """
+        cls, kwargs, _ = self.parse(argv)
         return cls, kwargs
+
+    def parse(self, argv=None):
+        """ Returns the selected command, the parameters for its `resolve` and a dict with the global options. """
+        argv = sys.argv[1:] if argv is None else list(argv)
+        self.setup()
+        name = self.selected_command(argv)
+        if name is not None and not self.is_batch(name):
+            self.setup_command_by_name(name)
+        cmd_args = self.parser.parse_args(argv)
+        fName = cmd_args.command
+        cls = self.get_command(fName)
+
+        kwargs = {n: v for n, v in cmd_args._get_kwargs() if n != "command" and n not in self.global_options}
+        options = {n[len("cli."):]: v for n, v in cmd_args._get_kwargs() if n in self.global_options}
+
+        return cls, kwargs, options
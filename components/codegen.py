@@ -0,0 +1,184 @@
+"""
+Code generation of factories: a resolved configuration is compiled into a plain Python function that calls the
+constructors of the components directly, without inspecting signatures, type hints or aliases.
+
+`compile_factory(Comp, **params)` resolves `Comp` once and returns a `Factory` that builds identical objects
+(including `get_params()`). Values that can't be written as literals (e.g. arbitrary objects, or classes that can't be
+imported) are injected into the factory when it is called.
+"""
+import hashlib
+import importlib.util
+import math
+import os
+import sys
+
+from components.component import Component
+from components.hooks import ResolveObserver
+
+_LITERAL_TYPES = (int, str, bytes, bool, type(None))
+
+
+def _is_literal(value):
+    """ Whether `repr(value)` evaluates to an equal value of the same type. """
+    if type(value) in _LITERAL_TYPES:
+        return True
+    if type(value) == float:
+        return math.isfinite(value)
+    if type(value) in (tuple, list, set, frozenset):
+        return type(value) != frozenset and all(map(_is_literal, value)) and (type(value) != set or len(value) > 0)
+    if type(value) == dict:
+        return all(_is_literal(k) and _is_literal(v) for k, v in value.items())
+    return False
+
+
+def _is_importable(cls):
+    """ Whether `cls` can be imported by its module and name. """
+    if '<locals>' in cls.__qualname__ or cls.__module__ == '__main__':
+        return False
+    module = sys.modules.get(cls.__module__)
+    obj = module
+    for name in cls.__qualname__.split('.'):
+        obj = getattr(obj, name, None)
+    return obj is cls
+
+
+class _ConstructionRecorder(ResolveObserver):
+    """ Records the objects constructed by resolve, so they can be distinguished from (shared) default values. """
+
+    def __init__(self):
+        self.constructed = dict()
+
+    def on_constructed(self, cls, path, obj):
+        if obj is not None:
+            self.constructed[id(obj)] = obj
+
+
+class _Generator(object):
+    """ Generates the statements that construct a resolved object. """
+
+    def __init__(self, constructed):
+        self.constructed = constructed
+        self.imports = dict()
+        self.injected = list()
+        self.statements = list()
+        # variable names of the objects that were already constructed (instances may be shared)
+        self.variables = dict()
+
+    def inject(self, value):
+        for index, injected in enumerate(self.injected):
+            if injected is value:
+                return f"injected[{index}]"
+        self.injected.append(value)
+        return f"injected[{len(self.injected) - 1}]"
+
+    def class_reference(self, cls):
+        if not _is_importable(cls):
+            return self.inject(cls)
+        if cls not in self.imports:
+            self.imports[cls] = f"_{cls.__qualname__.replace('.', '_')}_{len(self.imports)}"
+        return self.imports[cls]
+
+    def expression(self, value):
+        """ Returns an expression for `value`, adding the statements that construct it. """
+        if id(value) in self.variables:
+            return self.variables[id(value)]
+        if id(value) in self.constructed:
+            if isinstance(value, Component):
+                kwargs = ", ".join(f"{name}={self.expression(v)}" for name, v in value.get_params().items())
+                statement = f"{self.class_reference(type(value))}({kwargs})"
+            else:
+                # tuple of components, see `ComponentList`
+                items = [self.expression(v) for v in value]
+                statement = f"({', '.join(items)}{',' if len(items) == 1 else ''})"
+            variable = f"c{len(self.variables)}"
+            self.variables[id(value)] = variable
+            self.statements.append(f"{variable} = {statement}")
+            return variable
+        if _is_literal(value):
+            return repr(value)
+        return self.inject(value)
+
+    def source(self, cls, root):
+        lines = [
+            '"""',
+            f"Factory of {cls.__module__}.{cls.__qualname__}, generated by components.codegen.",
+            '"""',
+        ]
+        modules = dict()
+        for c in self.imports:
+            modules.setdefault(c.__module__, f"_module_{len(modules)}")
+        lines += [f"import {module} as {name}" for module, name in modules.items()]
+        lines += [f"{name} = {modules[c.__module__]}.{c.__qualname__}" for c, name in self.imports.items()]
+        lines += ["", f"INJECTED = {len(self.injected)}", "", "", "def create(injected=()):"]
+        lines += [f"    {statement}" for statement in self.statements]
+        lines += [f"    return {root}", ""]
+        return "\n".join(lines)
+
+
+class Factory(object):
+    """
+    A generated factory: `factory()` constructs the resolved configuration.
+    `source` is the Python source of the factory module, `injected` the values it needs that aren't literals.
+    """
+
+    def __init__(self, source, injected=(), function=None):
+        self.source = source
+        self.injected = tuple(injected)
+        if function is None:
+            namespace = dict()
+            exec(compile(source, "<components.codegen>", "exec"), namespace)
+            function = namespace['create']
+        self.function = function
+
+    @property
+    def key(self):
+        """ Hash of the source, e.g. as file name in a cache directory. """
+        return hashlib.sha1(self.source.encode()).hexdigest()[:16]
+
+    def __call__(self):
+        return self.function(self.injected)
+
+    def save(self, path):
+        """ Writes the source of the factory module to `path` (atomically). """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.source)
+        os.replace(tmp_path, path)
+
+
+def generate(cls, **params):
+    """ Resolves `cls` with `params` and returns the source of its factory and the injected values. """
+    recorder = _ConstructionRecorder()
+    with recorder:
+        obj = cls.resolve(**params)
+    generator = _Generator(recorder.constructed)
+    root = generator.expression(obj)
+    return generator.source(cls, root), generator.injected
+
+
+def compile_factory(cls, cache_dir=None, **params):
+    """
+    Resolves `cls` with `params` once and returns a `Factory` that constructs the same configuration.
+    With `cache_dir`, the factory module is written to that directory and imported from it.
+    """
+    factory = Factory(*generate(cls, **params))
+    if cache_dir is None:
+        return factory
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"factory_{factory.key}.py")
+    if not os.path.exists(path):
+        factory.save(path)
+    return load_factory(path, factory.injected)
+
+
+def load_factory(path, injected=()):
+    """ Imports a factory module that was written by `Factory.save` and returns the `Factory`. """
+    name = "_components_factory_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if len(injected) != module.INJECTED:
+        raise TypeError(f"Factory {path} expects {module.INJECTED} injected values, got {len(injected)}")
+    with open(path) as f:
+        source = f.read()
+    return Factory(source, injected, function=module.create)
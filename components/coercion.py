@@ -0,0 +1,193 @@
+"""
+Coercion of parameter values, e.g. strings from the command line or from JSON configs, into parameter types.
+A converter is compiled once per parameter type (as part of the resolution plan) and accepts strings as well as values
+that already have the right type.
+
+Lists, tuples and sets can be given as comma separated values ("1,2,3"), as JSON ("[1, 2, 3]") or as a reference to a
+file ("@values.txt") with a JSON array or one value per line, which is read in one pass.
+"""
+import enum
+import json
+import typing
+
+# strings that are converted to None for parameters with None as default
+NONE_STRINGS = {"none", "null"}
+TRUE_STRINGS = {"true", "yes", "y", "on", "1"}
+FALSE_STRINGS = {"false", "no", "n", "off", "0"}
+
+_COLLECTIONS = {list: list, tuple: tuple, set: set, frozenset: frozenset,
+                typing.List: list, typing.Tuple: tuple, typing.Set: set, typing.FrozenSet: frozenset}
+
+
+def runtime_type(tpe):
+    """ Returns the class of the values of type `tpe`, e.g. list for `List[int]`, or None (e.g. for `Union`). """
+    origin = getattr(tpe, '__origin__', None)
+    if origin is not None:
+        tpe = origin
+    # Python 3.6: the origin of List[int] is List, a generic class that keeps the builtin class in __extra__
+    tpe = getattr(tpe, '__extra__', None) or tpe
+    return tpe if isinstance(tpe, type) else None
+
+
+def type_name(tpe):
+    """ Readable name of a type, e.g. "int" or "List[int]". """
+    if isinstance(tpe, type) and not getattr(tpe, '__args__', None):
+        return tpe.__name__
+    return str(tpe).replace("typing.", "")
+
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        lower = value.strip().lower()
+        if lower in TRUE_STRINGS:
+            return True
+        if lower in FALSE_STRINGS:
+            return False
+        raise ValueError(f"Invalid boolean value: {value!r}")
+    if isinstance(value, (bool, int)):
+        return bool(value)
+    raise TypeError(f"Invalid boolean value: {value!r}")
+
+
+def _read_file(path):
+    """ Contents of the file referenced with "@path". Raises a ValueError if it can't be read. """
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError as e:
+        raise ValueError(f"Can't read {path!r}: {e.strerror or e}") from e
+
+
+def read_values(value):
+    """
+    Splits a string into a list of strings: "@path" reads the file at path, as JSON array or one value per line,
+    otherwise a JSON array or comma separated values. Non-string values are returned unchanged.
+    """
+    if not isinstance(value, str):
+        return value
+    if value.startswith("@"):
+        content = _read_file(value[1:])
+        if content.lstrip().startswith("["):
+            return json.loads(content)
+        return [line.strip() for line in content.splitlines() if line.strip()]
+    if value.lstrip().startswith("["):
+        return json.loads(value)
+    if not value.strip():
+        return []
+    return [part.strip() for part in value.split(",")]
+
+
+def _compile_collection(origin, args):
+    collection = _COLLECTIONS[origin]
+    if collection is tuple and args and not (len(args) == 2 and args[1] is Ellipsis):
+        # fixed length tuple with a type per element
+        converters = [compile_converter(arg) or (lambda v: v) for arg in args]
+
+        def convert_tuple(value):
+            values = read_values(value)
+            if len(values) != len(converters):
+                raise ValueError(f"Expected {len(converters)} values, got {len(values)}")
+            return tuple(convert(v) for convert, v in zip(converters, values))
+        return convert_tuple
+
+    element = compile_converter(args[0]) if args else None
+
+    def convert_collection(value):
+        values = read_values(value)
+        if element is None:
+            return collection(values)
+        return collection(map(element, values))
+    return convert_collection
+
+
+def _compile_mapping(args):
+    key = compile_converter(args[0]) if args else None
+    item = compile_converter(args[1]) if args else None
+
+    def convert_mapping(value):
+        if isinstance(value, str):
+            if value.startswith("@"):
+                value = json.loads(_read_file(value[1:]))
+            else:
+                value = json.loads(value)
+        return {key(k) if key else k: item(v) if item else v for k, v in dict(value).items()}
+    return convert_mapping
+
+
+def _compile_enum(tpe):
+    def convert_enum(value):
+        if isinstance(value, tpe):
+            return value
+        if isinstance(value, str) and value in tpe.__members__:
+            return tpe[value]
+        try:
+            return tpe(value)
+        except ValueError:
+            # e.g. "1" for an enum with int values
+            for member in tpe:
+                if str(member.value) == value:
+                    return member
+            raise
+    return convert_enum
+
+
+def _compile(tpe):
+    from components.component import Component
+
+    origin = getattr(tpe, '__origin__', None)
+    args = tuple(arg for arg in getattr(tpe, '__args__', None) or () if not isinstance(arg, typing.TypeVar))
+    if origin is typing.Union:
+        members = [arg for arg in args if arg is not type(None)]
+        convert = compile_converter(members[0]) if len(members) == 1 else None
+        if convert is None:
+            return None
+
+        def convert_optional(value):
+            if value is None or (isinstance(value, str) and value.strip().lower() in NONE_STRINGS):
+                return None
+            return convert(value)
+        return convert_optional
+    if origin in _COLLECTIONS:
+        return _compile_collection(origin, args)
+    if origin in (dict, typing.Dict):
+        return _compile_mapping(args)
+    if not isinstance(tpe, type):
+        return None
+    if issubclass(tpe, Component):
+        return None
+    if tpe is bool:
+        return lambda value: _parse_bool(value)
+    if issubclass(tpe, enum.Enum):
+        return _compile_enum(tpe)
+    if tpe in _COLLECTIONS:
+        return _compile_collection(tpe, ())
+    if tpe is dict:
+        return _compile_mapping(())
+
+    def convert_value(value):
+        if isinstance(value, tpe):
+            return value
+        return tpe(value)
+    return convert_value
+
+
+def compile_converter(tpe, optional=False):
+    """
+    Returns a function that converts a value (a string or a value of the right type) into type `tpe`, or None if
+    values of `tpe` are not converted (e.g. components). With `optional`, "none" and "null" are converted to None.
+    """
+    if tpe is None:
+        return None
+    convert = _compile(tpe)
+    if convert is None:
+        return None
+    if optional and tpe is not str:
+        inner = convert
+
+        def convert(value):
+            if isinstance(value, str) and value.strip().lower() in NONE_STRINGS:
+                return None
+            return inner(value)
+    # readable name in error messages and help of argparse
+    convert.__name__ = type_name(tpe)
+    return convert
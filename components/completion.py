@@ -0,0 +1,188 @@
+"""
+Static bash and zsh completion scripts generated from the argument specs of CLI commands (see `CLI.command_spec`).
+The scripts contain all option names, so completing doesn't need to start Python.
+"""
+import hashlib
+import json
+import pathlib
+import re
+
+# parameter names that hint at a file system path
+PATH_NAME = re.compile(r"(^|[-_])(path|file|filename|dir|directory|folder)s?$")
+
+# comment in every generated script with a hash of the specs it was generated from
+HEADER = "# {shell} completion for {prog}, generated by components.cli. Spec hash: {hash}"
+# the header is the first line of bash scripts and the second of zsh scripts, which have to start with `#compdef`
+HEADER_LINES = 2
+
+
+def header(lines):
+    """ Returns the header line among the first lines of a script (iterable of lines) or None. """
+    for _, line in zip(range(HEADER_LINES), lines):
+        if line.startswith("# ") and " Spec hash: " in line:
+            return line.rstrip("\n")
+    return None
+
+
+def is_path(argument):
+    """ Whether the value of an argument should be completed as a file system path. """
+    if argument['type'] is not None and isinstance(argument['type'], type) and \
+            issubclass(argument['type'], pathlib.PurePath):
+        return True
+    return argument['type'] in (None, str) and any(PATH_NAME.search(name) for name in argument['names'])
+
+
+def option_names(argument):
+    """ All option spellings of an argument, including `--no-` variants of booleans. """
+    names = list(argument['names'])
+    if argument['type'] == bool:
+        names += [f"--no-{name[2 if name[:2] == '--' else 1:]}" for name in argument['names']]
+    return names
+
+
+def spec_hash(commands):
+    """ Hash of the (name, doc, spec) tuples of all commands. """
+    data = [(name, doc, [dict(argument, type=getattr(argument['type'], '__name__', None)) for argument in spec])
+            for name, doc, spec in commands]
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def _function_name(prog):
+    return "_" + re.sub(r"\W", "_", prog) + "_complete"
+
+
+def _quote(text):
+    """ Single-quote text for the shell. """
+    return "'" + text.replace("'", "'\\''") + "'"
+
+
+def _summary(doc):
+    lines = [line.strip() for line in (doc or "").strip().splitlines()]
+    return lines[0] if lines else ""
+
+
+def bash_script(prog, commands, builtins=(), options=("-h", "--help"), value_options=()):
+    """
+    Returns a bash completion script for `prog` with `commands` a list of (name, doc, spec) tuples.
+    `builtins` are the names of additional subcommands, `options` the top level options and `value_options` the top
+    level options that take a value (which is skipped when looking for the subcommand).
+    """
+    function = _function_name(prog)
+    top_level = list(options) + [c[0] for c in commands] + list(builtins)
+    lines = [
+        HEADER.format(shell="bash", prog=prog, hash=spec_hash(commands)),
+        f"{function}() {{",
+        '    local cur="${COMP_WORDS[COMP_CWORD]}" prev="${COMP_WORDS[COMP_CWORD-1]}" cmd="" word skip=""',
+        '    for word in "${COMP_WORDS[@]:1:COMP_CWORD-1}"; do',
+        '        if [ -n "$skip" ]; then skip=""; continue; fi',
+    ]
+    if value_options:
+        lines.append(f'        case "$word" in {"|".join(value_options)}) skip=1;; -*) ;; *) cmd="$word"; break;; esac')
+    else:
+        lines.append('        case "$word" in -*) ;; *) cmd="$word"; break;; esac')
+    lines += [
+        '    done',
+        '    if [ -z "$cmd" ]; then',
+        # the value of a top level option
+        '        [ -n "$skip" ] && { COMPREPLY=(); return; }',
+        f'        COMPREPLY=( $(compgen -W {_quote(" ".join(top_level))} -- "$cur") )',
+        '        return',
+        '    fi',
+        '    case "$cmd" in',
+    ]
+    for name, doc, spec in commands:
+        path_options = [n for argument in spec if is_path(argument) for n in argument['names']]
+        value_options = [n for argument in spec if argument['type'] != bool and not is_path(argument)
+                         for n in argument['names']]
+        options = ["-h", "--help"] + [n for argument in spec for n in option_names(argument)]
+        lines.append(f"        {name})")
+        lines.append('            case "$prev" in')
+        if path_options:
+            lines.append(f'                {"|".join(path_options)}) COMPREPLY=( $(compgen -f -- "$cur") ); return;;')
+        if value_options:
+            lines.append(f'                {"|".join(value_options)}) COMPREPLY=(); return;;')
+        lines.append('            esac')
+        lines.append(f'            COMPREPLY=( $(compgen -W {_quote(" ".join(options))} -- "$cur") );;')
+    lines += [
+        '    esac',
+        '}',
+        f"complete -o default -F {function} {prog}",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def zsh_script(prog, commands, builtins=(), options=("-h", "--help"), value_options=()):
+    """
+    Returns a zsh completion script for `prog` with `commands` a list of (name, doc, spec) tuples.
+    `builtins` are the names of additional subcommands. Top level `options` are not completed by zsh, the values of
+    `value_options` are skipped when looking for the subcommand.
+    """
+    function = _function_name(prog)
+
+    def escape(text):
+        return text.replace("\\", "\\\\").replace(":", "\\:").replace("[", "\\[").replace("]", "\\]")
+
+    descriptions = " ".join([_quote(f"{escape(name)}:{escape(_summary(doc))}") for name, doc, _ in commands] +
+                            [_quote(name) for name in builtins])
+    lines = [
+        # zsh only autoloads completion functions from files (in fpath) with `#compdef` on the first line
+        f"#compdef {prog}",
+        HEADER.format(shell="zsh", prog=prog, hash=spec_hash(commands)),
+        f"{function}() {{",
+        f"    local -a commands; commands=({descriptions})",
+        '    local i=2 cmd="" skip=""',
+        "    while (( i < CURRENT )); do",
+        '        if [[ -n $skip ]]; then skip=""',
+        '        else',
+        '            case "$words[i]" in',
+    ]
+    if value_options:
+        lines.append(f'                ({"|".join(value_options)}) skip=1 ;;')
+    lines += [
+        '                (-*) ;;',
+        '                (*) cmd=$words[i]; break ;;',
+        '            esac',
+        '        fi',
+        "        (( i++ ))",
+        "    done",
+        "    if [[ -z $cmd ]]; then",
+        # the value of a top level option
+        "        [[ -n $skip ]] && return",
+        "        _describe 'subcommand' commands",
+        "        return",
+        "    fi",
+        # let _arguments see the words from the subcommand on
+        "    words=(${words[i,-1]}); (( CURRENT -= i - 1 ))",
+        '    case "$cmd" in',
+    ]
+    for name, doc, spec in commands:
+        arguments = list()
+        for argument in spec:
+            for option in option_names(argument):
+                if argument['type'] == bool:
+                    arguments.append(_quote(option))
+                elif is_path(argument):
+                    arguments.append(_quote(f"{option}:path:_files"))
+                else:
+                    metavar = getattr(argument['type'], '__name__', 'value')
+                    arguments.append(_quote(f"{option}:{metavar}: "))
+        lines.append(f"        {name}) _arguments {' '.join(arguments)} ;;")
+    lines += [
+        "    esac",
+        "}",
+        # autoloaded (fpath): complete now, sourced: register the function
+        "if [[ $zsh_eval_context[-1] == loadautofunc ]]; then",
+        f'    {function} "$@"',
+        "else",
+        f"    compdef {function} {prog}",
+        "fi",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+SCRIPTS = {
+    'bash': bash_script,
+    'zsh': zsh_script,
+}
@@ -1,13 +1,30 @@
+import collections
 import inspect
+import operator
+import threading
+import time
 import warnings
 import typing
+import weakref
 
+from components import coercion, hooks, validation
 from components.param import Param, ComponentParam
 
 # backport for typing < 3.8
 get_origin = getattr(typing, 'get_origin', lambda x: getattr(x, '__origin__', None))
 get_args = getattr(typing, 'get_args', lambda x: getattr(x, '__args__', None))
 
+# name of the class attribute with the cached resolution plan of a component class: a list with (plan, class stamps).
+# It is stored on the class, rather than in a global mapping, because the stamps refer to the class itself (e.g.
+# through its methods), which would otherwise keep classes that are created dynamically alive.
+_PLAN_ATTRIBUTE = "__components_plan__"
+# component classes with a cached plan
+_planned = weakref.WeakSet()
+# cached converters of the values of parameters per component class: (plan, {alias: converter})
+_converters = weakref.WeakKeyDictionary()
+# thread local state active during resolve, e.g. the stack of instance caches
+_local = threading.local()
+
 
 class Component(object):
     """
@@ -66,7 +83,7 @@ class Component(object):
             vs = repr(v)
             if not recursive and isinstance(v, Component):
                 vs = f"{v.name}({rec_placeholder})"
-            if not recursive and isinstance(v, tuple):
+            if not recursive and isinstance(v, tuple) and all(isinstance(vv, Component) for vv in v):
                 vs = sep.join([f"{vv.name}({rec_placeholder})" for vv in v])
                 vs = f"({vs})"
             params.append(f"{k}{eq}{vs}")
@@ -137,9 +154,8 @@ class Component(object):
                 else:
                     tpe = None
 
-            # if type is Tuple[], treat as tuple of parameters
-            if get_origin(tpe) == tuple or get_origin(tpe) == typing.Tuple:
-                # check against typing.Tuple (Python3.6) and tuple (Python 3.7 onward)
+            # if type is Tuple[] of components, treat as tuple of parameters
+            if _is_component_tuple(tpe):
                 tpe = ComponentList(tpe.__args__)
                 if default == inspect.Parameter.empty:
                     default = list()
@@ -154,7 +170,7 @@ class Component(object):
                 aliases = {prefix + '_' + parname for prefix in parent_aliases}
                 aliases.add(parname)
 
-            tpe_is_comp = tpe is not None and isinstance(tpe, type) and issubclass(tpe, Component)
+            tpe_is_comp = _is_component_type(tpe)
             if tpe_is_comp:
                 param = ComponentParam(parname, tpe, default, aliases=aliases)
                 param.params = tpe._resolve_requested_names(aliases)
@@ -193,14 +209,14 @@ class Component(object):
                 key = list(key)[0]
                 new_type = provided_types.pop(key)
 
-                # if type is Tuple[], treat as tuple of parameters
-                if get_origin(new_type) == tuple or get_origin(new_type) == typing.Tuple:
+                # if type is Tuple[] of components, treat as tuple of parameters
+                if _is_component_tuple(new_type):
                     new_type = ComponentList(new_type.__args__)
 
                 param.type = new_type
 
-                old_is_comp = old_type is not None and isinstance(old_type, type) and issubclass(old_type, Component)
-                new_is_comp = issubclass(param.type, Component)
+                old_is_comp = _is_component_type(old_type)
+                new_is_comp = _is_component_type(param.type)
                 if old_is_comp != new_is_comp:
                     raise TypeError(f"Tried to change type {old_type} into {param.type}, which isn't allowed.")
 
@@ -236,13 +252,99 @@ class Component(object):
     def resolve_provided_params(self, requested_params):
         pass
 
+    @classmethod
+    def get_plan(cls):
+        """
+        Returns the resolution plan of this component: the requested parameter hierarchy used by `resolve`, with a
+        compiled validator and converter per parameter.
+        The plan is computed once per class and cached. It is recomputed when attributes of the classes it depends on
+        are set or deleted (e.g. `Comp.key = 8`), but not when mutable attributes are changed in place: call
+        `Component.clear_plan_cache` after e.g. changing `__annotations__` of components that were already resolved.
+        Plans that depend on classes that override `get_provided_parameters` or `get_provided_types` aren't cached,
+        because their results can change at any time.
+        """
+        plan = _cached_plan(cls)
+        if plan is None:
+            plan = cls.get_requested_params()
+            _compile_plan(plan)
+            classes = _plan_classes(cls, plan)
+            if not any(name in vars(c) for c in classes if c is not Component for name in _PROVIDER_HOOKS):
+                holder = vars(cls).get(_PLAN_ATTRIBUTE)
+                if holder is None:
+                    # set before taking the stamps, so it is part of them
+                    holder = [None]
+                    setattr(cls, _PLAN_ATTRIBUTE, holder)
+                holder[0] = plan, _class_stamps(classes)
+                _planned.add(cls)
+        return plan
+
+    @staticmethod
+    def clear_plan_cache():
+        """ Removes all cached resolution plans. """
+        for cls in list(_planned):
+            vars(cls)[_PLAN_ATTRIBUTE][0] = None
+        _planned.clear()
+        _converters.clear()
+
+    @classmethod
+    def coerce_params(cls, params, errors=None):
+        """
+        Returns a copy of `params` (as passed to `resolve`) with the values converted to the types of the parameters,
+        e.g. strings from a JSON config. See `components.coercion`.
+        Raises a TypeError if a value can't be converted, unless `errors` is given: then the value is kept and the
+        error message is added to the dict `errors` under the name of the parameter.
+        """
+        plan = cls.get_plan()
+        plan_converters, converters = _converters.get(cls, (None, None))
+        if plan_converters is not plan:
+            converters = dict()
+            for param in sum((param.flatten() for param in plan), []):
+                if param.converter is not None:
+                    converters.update(dict.fromkeys(param.aliases, param.converter))
+            _converters[cls] = plan, converters
+        coerced = dict(params)
+        for key, value in params.items():
+            converter = converters.get(key)
+            if converter is not None:
+                try:
+                    coerced[key] = converter(value)
+                except (TypeError, ValueError) as e:
+                    message = f"Can't convert parameter '{key}' to {converter.__name__}: {e}"
+                    if errors is None:
+                        raise TypeError(message) from e
+                    errors[key] = message
+        return coerced
+
     @classmethod
     def resolve(cls, **params):
         """
         Resolves the components and subcomponents recursively.
         Uses `cls.get_provided_parameters` first to set default values, then overrides with strict **params.
         """
-        requested_params = cls.get_requested_params()
+        return cls._resolve_root(params)
+
+    @classmethod
+    def resolve_coerced(cls, **params):
+        """
+        `resolve`, with the values of **params first converted to the types of the parameters (see `coerce_params`),
+        e.g. strings from a JSON config.
+        """
+        return cls._resolve_root(params, coerce=True)
+
+    @classmethod
+    def _resolve_root(cls, params, coerce=False):
+        """ Resolves `cls` as root component with the dict `params`, see `resolve`. """
+        observers = hooks.active_observers()
+        if observers:
+            start = time.perf_counter()
+            cached = _cached_plan(cls) is not None
+            requested_params = cls.get_plan()
+            for observer in observers:
+                observer.on_plan(cls, time.perf_counter() - start, cached)
+        else:
+            requested_params = cls.get_plan()
+        if coerce:
+            params = cls.coerce_params(params)
         object = cls._resolve(params, dict(), requested_params)
 
         # Check if all params were used
@@ -252,60 +354,320 @@ class Component(object):
         return object
 
     @classmethod
-    def _resolve(cls, params, parent_provided_params, requested_params):
+    def _resolve(cls, params, parent_provided_params, requested_params, path=()):
         """
         Resolves the components and subcomponents recursively.
         Uses `provided_params` first to set default values, then overrides with params.
         Need to pop from params to check if they were all used.
+        `path` contains the parameter names of this component from the root component.
         """
+        if getattr(_local, 'dry_run', False):
+            kwargs = cls._resolve_kwargs(params, parent_provided_params, requested_params, path)
+            return cls._placeholder(kwargs)
+        observers = hooks.active_observers()
+        if observers:
+            return cls._resolve_observed(observers, params, parent_provided_params, requested_params, path)
+        kwargs = cls._resolve_kwargs(params, parent_provided_params, requested_params, path)
+        return cls._construct(kwargs)
+
+    @classmethod
+    def _placeholder(cls, kwargs):
+        """ Instance of this component that is not initialized, used by `validate` instead of constructing it. """
+        return object.__new__(cls)
+
+    @classmethod
+    def validate(cls, **params):
+        """
+        Checks whether `resolve` would succeed with `params`, without constructing any component: reports unknown
+        parameters, type mismatches, missing parameters and values supplied under multiple aliases.
+        Returns a `ValidationReport`, which is `valid` if there are no problems.
+        """
+        return cls._validate(params)
+
+    @classmethod
+    def validate_coerced(cls, **params):
+        """
+        Checks whether `resolve_coerced` would succeed with `params`, see `validate`. Values that can't be converted
+        are reported as type mismatches (under the name they were given with).
+        """
+        return cls._validate(params, coerce=True)
+
+    @classmethod
+    def _validate(cls, params, coerce=False):
+        """ Validates the dict `params` for `cls` as root component, see `validate`. """
+        report = validation.ValidationReport()
+        try:
+            requested_params = cls.get_plan()
+        except (TypeError, AttributeError) as e:
+            # e.g. conflicting attribute overrides or parameters without a valid name: nothing else can be checked
+            report.add(validation.Diagnostic(cls, (), None, "error", str(e)))
+            return report
+        unconverted = dict()
+        if coerce:
+            params = cls.coerce_params(params, errors=unconverted)
+        for name, message in unconverted.items():
+            report.add(validation.Diagnostic(cls, (), name, "type", message))
+        params = dict(params)
+        dry_run, _local.dry_run = getattr(_local, 'dry_run', False), True
+        # values that couldn't be converted were reported already
+        previous, _local.unconverted = getattr(_local, 'unconverted', ()), unconverted
+        try:
+            with validation.validation(validation.WARN, report=report):
+                cls._resolve(params, dict(), requested_params)
+        except (TypeError, AttributeError) as e:
+            report.add(validation.Diagnostic(cls, (), None, "error", str(e)))
+            return report
+        finally:
+            _local.dry_run = dry_run
+            _local.unconverted = previous
+        for name in params:
+            report.add(validation.Diagnostic(cls, (), name, "unknown", f"Unexpected parameter: {name}"))
+        return report
+
+    @classmethod
+    def validate_all(cls, param_sets, coerce=False):
+        """
+        Validates every dict of parameters in `param_sets`, see `validate` (`validate_coerced` with `coerce`).
+        Returns a list of reports.
+        """
+        return [cls._validate(params, coerce=coerce) for params in param_sets]
+
+    @classmethod
+    def _resolve_observed(cls, observers, params, parent_provided_params, requested_params, path):
+        """ `_resolve` that notifies the active resolve observers. """
+        obj = None
+        for observer in observers:
+            observer.on_enter(cls, path)
+        try:
+            kwargs = cls._resolve_kwargs(params, parent_provided_params, requested_params, path)
+            for observer in observers:
+                observer.on_construct(cls, path)
+            try:
+                obj = cls._construct(kwargs)
+            finally:
+                for observer in reversed(observers):
+                    observer.on_constructed(cls, path, obj)
+        finally:
+            for observer in reversed(observers):
+                observer.on_exit(cls, path, obj)
+        return obj
+
+    @classmethod
+    def _construct(cls, kwargs):
+        """ Instantiates the component with resolved arguments. """
+        instance_cache = InstanceCache.active()
+        if instance_cache is not None and instance_cache.handles(cls):
+            return instance_cache.get_or_create(cls, kwargs)
+        return cls(**kwargs)
+
+    @classmethod
+    def _resolve_kwargs(cls, params, parent_provided_params, requested_params, path):
+        """ Returns the arguments for `__init__`, resolving subcomponents. """
         provided_params = cls.get_provided_parameters()
         provided_params.update(parent_provided_params)
+        level = validation.get_validation_level()
+        check = level != validation.OFF
         kwargs = dict()
         for requested_param in requested_params:
             found = False
+            key = None
             value = None
             # Try to find it in the user params
             if requested_param.aliases & params.keys():
                 found = True
                 key = requested_param.aliases & params.keys()
                 if len(key) > 1:
-                    raise TypeError(f"Value for parameter {requested_param.full_name} supplied multiple times: {key}")
+                    message = f"Value for parameter {requested_param.full_name} supplied multiple times: {key}"
+                    if not getattr(_local, 'dry_run', False):
+                        raise TypeError(message)
+                    # validate: report the conflict and use the value of the shortest alias
+                    cls._diagnose(level, "conflict", requested_param.name, message, path)
+                    key = sorted(key, key=len)
+                    for other in key[1:]:
+                        params.pop(other)
                 key = list(key)[0]
                 value = params.pop(key)
             # In the case of a component: see if the type is a component and try to resolve it.
-            elif requested_param.type is not None and issubclass(
-                    requested_param.type, Component):
+            elif _is_component_type(requested_param.type):
                 # param is of type ComponentParam
                 found = True
-                value = requested_param.type._resolve(params, provided_params, requested_param.params)
+                value = requested_param.type._resolve(params, provided_params, requested_param.params,
+                                                      path + (requested_param.name,))
             # No parameter found? No worries, there is a default
             elif requested_param.default is not inspect.Parameter.empty:
                 found = True
                 value = requested_param.default
 
             if found:
-                if requested_param.type is not None and not issubclass(
-                        requested_param.type, _ComponentList):
-                    if not isinstance(value, requested_param.type):
-                        # warn for type mismatch, except for trivial cases:
-                        if (requested_param.default is None and value is None) or (requested_param.type == float and type(value) == int):
-                            pass
-                        else:
-                            warnings.warn(
-                                f"Parameter '{requested_param.full_name}' expected type {requested_param.type}, but got {type(value)} instead",
-                                RuntimeWarning)
+                if check and requested_param.validator is not None:
+                    message = requested_param.validator(value)
+                    if message is not None and key not in getattr(_local, 'unconverted', ()):
+                        cls._diagnose(level, "type", requested_param.name, message, path)
                 kwargs[requested_param.name] = value
-            else:
+            elif check:
                 # no default and no provided parameter: can't instantiate component.
                 #  error will be raised when trying to instantiate.
-                warnings.warn(f"Missing parameter for resolve: {requested_param.name}", RuntimeWarning)
-        return cls(**kwargs)
+                cls._diagnose(level, "missing", requested_param.name,
+                              f"Missing parameter for resolve: {requested_param.name}", path)
+        return kwargs
+
+    @classmethod
+    def _diagnose(cls, level, kind, parameter, message, path):
+        """
+        Handles a validation problem of this component according to the validation level: adds it to the active
+        `ValidationReport` or emits a RuntimeWarning, and raises a TypeError if the level is strict.
+        Notifies the resolve observers.
+        """
+        for observer in hooks.active_observers() or ():
+            observer.on_warning(cls, path, message)
+        report = validation.active_report()
+        if report is not None:
+            report.add(validation.Diagnostic(cls, path, parameter, kind, message))
+        if level == validation.STRICT:
+            raise TypeError(message)
+        if report is None:
+            warnings.warn(message, RuntimeWarning, stacklevel=2)
 
     def get_params(self):
         """ Returns a dictionary of the parameters and their values that were supplied through __init__. """
         return self.__params
 
 
+def _is_component_type(tpe):
+    """ Whether `tpe` is a component class (and not e.g. a generic type like `List[int]`). """
+    return tpe is not None and isinstance(tpe, type) and issubclass(tpe, Component)
+
+
+def _is_component_tuple(tpe):
+    """ Whether `tpe` is a `Tuple[...]` of components (rather than e.g. `Tuple[int, int]`). """
+    # check against typing.Tuple (Python3.6) and tuple (Python 3.7 onward)
+    if get_origin(tpe) != tuple and get_origin(tpe) != typing.Tuple:
+        return False
+    return any(_is_component_type(arg) or _is_component_tuple(arg) for arg in tpe.__args__)
+
+
+def _compile_plan(params):
+    """ Compiles the validators and converters of the values of `params` and their subparameters. """
+    for param in params:
+        if _is_component_type(param.type) and issubclass(param.type, _ComponentList):
+            param.validator = None
+        else:
+            param.validator = validation.compile_validator(param)
+        param.converter = coercion.compile_converter(param.type, optional=param.default is None)
+        if isinstance(param, ComponentParam):
+            _compile_plan(param.params)
+
+
+# methods that determine the provided parameters and types of the plan
+_PROVIDER_HOOKS = ("get_provided_parameters", "get_provided_types")
+
+
+def _plan_classes(cls, plan):
+    """ Returns the classes that `plan` of `cls` depends on: the classes of all its components and their bases. """
+    classes = dict()
+
+    def visit(component_cls, params):
+        classes.update(dict.fromkeys(c for c in component_cls.__mro__ if c is not object))
+        for param in params:
+            if isinstance(param, ComponentParam):
+                visit(param.type, param.params)
+
+    visit(cls, plan)
+    return list(classes)
+
+
+def _class_stamps(classes):
+    """ Returns the attributes of `classes`, to detect changes of provided parameters and types. """
+    return [(c, tuple(vars(c)), tuple(vars(c).values())) for c in classes]
+
+
+def _cached_plan(cls):
+    """ Returns the cached plan of `cls` or None if there is none or the classes it depends on were changed. """
+    holder = vars(cls).get(_PLAN_ATTRIBUTE)
+    cached = holder[0] if holder is not None else None
+    if cached is None:
+        return None
+    plan, stamps = cached
+    for c, names, values in stamps:
+        attributes = vars(c)
+        # values are compared by identity, which is fast and works for any value
+        if len(attributes) != len(names) or not all(map(operator.is_, attributes.values(), values)) \
+                or tuple(attributes) != names:
+            return None
+    return plan
+
+
+def structural_key(value):
+    """
+    Returns a hashable key that describes the configuration of a value.
+    Components are described by their class and the structural keys of their parameters, recursively.
+    """
+    if isinstance(value, Component):
+        params = tuple((k, structural_key(v)) for k, v in sorted(value.get_params().items()))
+        return f"{value.__class__.__module__}.{value.__class__.__qualname__}", params
+    if isinstance(value, tuple):
+        return tuple(map(structural_key, value))
+    return repr(value)
+
+
+class InstanceCache(object):
+    """
+    Reuses resolved components across calls to `resolve`.
+    Components of the given types (or subtypes) are constructed once per configuration. Use as context manager:
+    `with cache: Comp.resolve()`. With `max_size`, the least recently used instances are removed when there are more.
+    """
+
+    def __init__(self, types=(), instances=None, max_size=None):
+        self.types = tuple(types)
+        self.instances = collections.OrderedDict() if instances is None else collections.OrderedDict(instances)
+        self.max_size = max_size
+
+    @staticmethod
+    def active():
+        """ Returns the innermost instance cache that is active in this thread, or None. """
+        stack = getattr(_local, 'instance_caches', None)
+        if not stack:
+            return None
+        return stack[-1]
+
+    def __enter__(self):
+        if not hasattr(_local, 'instance_caches'):
+            _local.instance_caches = list()
+        _local.instance_caches.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.instance_caches.pop()
+
+    def handles(self, cls):
+        """ Whether components of type `cls` are cached. """
+        return issubclass(cls, self.types)
+
+    @staticmethod
+    def key(cls, kwargs):
+        """ Key of a component with type `cls` constructed with `kwargs`. """
+        params = tuple((k, structural_key(v)) for k, v in sorted(kwargs.items()))
+        return cls, params
+
+    def get_or_create(self, cls, kwargs):
+        """ Returns the cached instance for this configuration or constructs and caches a new one. """
+        key = self.key(cls, kwargs)
+        obj = self.instances.get(key)
+        for observer in hooks.active_observers() or ():
+            observer.on_instance_cache(cls, obj is not None)
+        if obj is None:
+            obj = cls(**kwargs)
+            self.instances[key] = obj
+            if self.max_size is not None and len(self.instances) > self.max_size:
+                self.instances.popitem(last=False)
+        else:
+            self.instances.move_to_end(key)
+        return obj
+
+    def clear(self):
+        self.instances.clear()
+
+
 class _ComponentList(Component):
     """ Helper class to parse Tuple[Component, ...] type params. Don't use this directly. """
     def __new__(cls, *args, **kwargs):
@@ -315,6 +677,11 @@ class _ComponentList(Component):
             comps[int(index)] = comp
         return tuple(comps)
 
+    @classmethod
+    def _placeholder(cls, kwargs):
+        # components can be missing during `validate`
+        return tuple(kwargs[index] for index in sorted(kwargs, key=int))
+
     @staticmethod
     def comp_types():
         raise NotImplementedError("comp_types has to be implemented by subclass")
@@ -331,8 +698,8 @@ class _ComponentList(Component):
                 # Variadic type given, means don't fill in components
                 return []
 
-            # if type is Tuple[], treat as list
-            if get_origin(tpe) == tuple or get_origin(tpe) == typing.Tuple:
+            # if type is Tuple[] of components, treat as list
+            if _is_component_tuple(tpe):
                 tpe = ComponentList(tpe.__args__)
 
             name = str(index)
@@ -341,7 +708,7 @@ class _ComponentList(Component):
             aliases = {prefix + '_' + name for prefix in parent_aliases}
             aliases.add(name)
 
-            if tpe is not None and issubclass(tpe, Component):
+            if _is_component_type(tpe):
                 param = ComponentParam(name, tpe, inspect.Parameter.empty, aliases=aliases)
                 param.params = tpe._resolve_requested_names(aliases)
             else:
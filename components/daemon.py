@@ -0,0 +1,125 @@
+"""
+Daemon mode for the CLI: a long-running process keeps modules, resolution plans and (optionally) shared components
+warm, while a thin client forwards its arguments over a local Unix socket.
+
+Server: `cli.serve("/tmp/app.sock")`
+Client: `python -m components.daemon /tmp/app.sock <command> [args]`
+"""
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+
+
+class _StreamWriter(object):
+    """ File-like object that forwards everything written to it as messages of one stream. """
+
+    def __init__(self, wfile, stream):
+        self.wfile = wfile
+        self.stream = stream
+
+    def write(self, data):
+        if data:
+            _send(self.wfile, {self.stream: data})
+        return len(data)
+
+    def flush(self):
+        self.wfile.flush()
+
+
+def _send(wfile, message):
+    wfile.write(json.dumps(message).encode() + b"\n")
+    wfile.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline().decode())
+        code = self.server.execute(request.get('argv', []), request.get('cwd'),
+                                   _StreamWriter(self.wfile, 'stdout'), _StreamWriter(self.wfile, 'stderr'))
+        _send(self.wfile, {'exit': code})
+
+
+class Daemon(socketserver.UnixStreamServer):
+    """
+    Unix socket server that executes CLI invocations in the current process.
+    Requests are handled one at a time, because stdout, stderr and the working directory are redirected per request.
+    At most `max_instances` shared components are kept, the least recently used are removed first.
+    """
+
+    def __init__(self, cli, socket_path, shared=(), max_instances=128):
+        from components.component import InstanceCache
+        self.cli = cli
+        self.socket_path = socket_path
+        self.instance_cache = InstanceCache(shared, max_size=max_instances)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+        self.warm_up()
+
+    def warm_up(self):
+        """ Builds the parsers and resolution plans of all commands. """
+        self.cli.setup_all()
+        for cls in self.cli.commands.values():
+            cls.get_plan()
+
+    def execute(self, argv, cwd, stdout, stderr):
+        """ Runs the CLI with `argv` and returns the exit code. """
+        old_cwd = os.getcwd()
+        code = 0
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                if cwd is not None:
+                    os.chdir(cwd)
+                with self.instance_cache:
+                    self.cli.run(argv)
+            except SystemExit as e:
+                # raised by argparse for `-h` and invalid arguments
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os.chdir(old_cwd)
+                sys.stdout.flush()
+        return code
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def request(socket_path, argv, stdout=None, stderr=None):
+    """ Forwards `argv` to the daemon at `socket_path`, streams its output and returns the exit code. """
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile('rwb') as f:
+            _send(f, {'argv': list(argv), 'cwd': os.getcwd()})
+            for line in f:
+                message = json.loads(line.decode())
+                if 'stdout' in message:
+                    stdout.write(message['stdout'])
+                elif 'stderr' in message:
+                    stderr.write(message['stderr'])
+                elif 'exit' in message:
+                    return message['exit']
+    # connection closed without exit code
+    return 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 1:
+        print("usage: python -m components.daemon socket_path [command] [args ...]", file=sys.stderr)
+        return 2
+    return request(argv[0], argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Base component for data sources that are backed by a file, exposed through `mmap`.
+"""
+import mmap
+import os
+
+from components.component import Component
+from components.pickling import ParamPickling
+
+
+class MemoryMappedSource(Component, ParamPickling):
+    """
+    Data source with the bytes `[offset, offset + length)` of the file at `path` (`length` None: until the end).
+    The file is mapped into memory on first access, slices and chunks are zero-copy views of the mapping.
+    With `sequential`, the kernel is advised to read ahead and pages are released after they were iterated over,
+    which suits a single pass over a large file.
+    Only the parameters are pickled (see `ParamPickling`), so sending a source to a worker process is cheap.
+    """
+
+    def __init__(self, path: str, offset: int = 0, length: int = None, sequential: bool = False):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.sequential = sequential
+        self._mmap = None
+        self._view = None
+        # position of the data in the mapping
+        self._delta = 0
+
+    def open(self):
+        """ Maps the file into memory, if it isn't yet. Returns the view of the data. """
+        if self._view is not None:
+            return self._view
+        size = os.path.getsize(self.path)
+        length = size - self.offset if self.length is None else min(self.length, size - self.offset)
+        if length <= 0:
+            self._view = memoryview(b"")
+            return self._view
+        # mmap offsets have to be a multiple of the allocation granularity
+        start = self.offset - self.offset % mmap.ALLOCATIONGRANULARITY
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), length + self.offset - start, access=mmap.ACCESS_READ, offset=start)
+        self._delta = self.offset - start
+        self._view = memoryview(self._mmap)[self._delta:]
+        self._advise('MADV_SEQUENTIAL' if self.sequential else 'MADV_NORMAL')
+        return self._view
+
+    def close(self):
+        """ Unmaps the file. Views that are still referenced keep the mapping alive. """
+        view, mapping = self._view, self._mmap
+        self._view = self._mmap = None
+        try:
+            if view is not None:
+                view.release()
+            if mapping is not None:
+                mapping.close()
+        except BufferError:
+            pass
+
+    def _advise(self, name, start=0, length=None):
+        """ Calls madvise with flag `name` on a range of the mapping, if the platform supports it. """
+        flag = getattr(mmap, name, None)
+        if flag is None or self._mmap is None or not hasattr(self._mmap, 'madvise'):
+            return
+        # madvise needs page aligned ranges of the mapping
+        start += self._delta
+        aligned = start - start % mmap.PAGESIZE
+        end = len(self._mmap) if length is None else min(start + length, len(self._mmap))
+        length = end - aligned
+        if length > 0:
+            self._mmap.madvise(flag, aligned, length)
+
+    def fingerprint(self):
+        """ Modification time and size of the file, e.g. to detect changed data (see `components.artifacts`). """
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def data(self):
+        """ Zero-copy, read-only view of the data. """
+        return self.open()
+
+    def __len__(self):
+        return len(self.open())
+
+    def __getitem__(self, item):
+        """ Zero-copy slicing: `source[start:stop]` returns a memoryview. """
+        return self.open()[item]
+
+    def chunks(self, size=1 << 20):
+        """ Yields consecutive views of (at most) `size` bytes. """
+        view = self.open()
+        for start in range(0, len(view), size):
+            if self.sequential:
+                self._advise('MADV_WILLNEED', start + size, size)
+            yield view[start:start + size]
+            if self.sequential:
+                # the pages stay in the page cache, but don't need to stay mapped in this process
+                self._advise('MADV_DONTNEED', start, size)
+
+    def array(self, dtype="uint8", shape=None):
+        """ Returns the data as a read-only NumPy memmap. Requires NumPy. """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("MemoryMappedSource.array requires NumPy") from None
+        if shape is None:
+            shape = (len(self) // numpy.dtype(dtype).itemsize,)
+        return numpy.memmap(self.path, dtype=dtype, mode='r', offset=self.offset, shape=shape)
@@ -0,0 +1,144 @@
+"""
+Fork-server execution: shared subcomponents are resolved once in a parent process and inherited (copy-on-write) by
+forked worker processes that resolve and run the rest of the component graph.
+"""
+import gc
+import multiprocessing
+import threading
+
+from components.component import InstanceCache
+from components.param import ComponentParam
+
+# server of a worker process, set by `_init_worker` when the worker is forked. Jobs are sent to the pool as plain
+# params, because the server (with its resolved components) can't be pickled cheaply; forked workers inherit it
+# instead. Every server passes itself to its own pool, so multiple servers can be active in one parent process.
+_server = None
+
+
+# number of started servers in this process that froze the heap (see `gc.freeze`). The heap is unfrozen when the last
+# one closes, because freezing applies to the whole process.
+_frozen_servers = 0
+_frozen_lock = threading.Lock()
+
+
+def _freeze():
+    global _frozen_servers
+    with _frozen_lock:
+        # move all objects to a permanent generation so the collector doesn't touch (and copy) their pages
+        gc.collect()
+        gc.freeze()
+        _frozen_servers += 1
+
+
+def _unfreeze():
+    global _frozen_servers
+    with _frozen_lock:
+        _frozen_servers -= 1
+        if _frozen_servers == 0:
+            gc.unfreeze()
+
+
+def _init_worker(server):
+    global _server
+    _server = server
+
+
+def _run_job(params):
+    return _server.execute(params)
+
+
+class ForkServer(object):
+    """
+    Runs jobs of component `cls` in forked worker processes.
+    Subcomponents with a type in `shared` are resolved once in the parent, with the common `**params`, before the
+    workers are forked. Every job resolves `cls` with the common params updated by its own params, reusing the shared
+    instances when their configuration matches, and returns the result of `run()`.
+    With `shared_memory`, the outputs of the `shared_output` methods of the shared components are computed once and
+    placed in shared memory, which is removed when the server is closed (see `components.shared_memory`).
+    Use as context manager: `with ForkServer(Experiment, [DataSource]) as server: server.map([{'ratio': 0.5}])`.
+    Requires the 'fork' start method (Linux, macOS).
+    """
+
+    def __init__(self, cls, shared, processes=None, shared_memory=False, **params):
+        self.cls = cls
+        self.params = params
+        self.processes = processes
+        self.instance_cache = InstanceCache(shared)
+        self.store = None
+        if shared_memory:
+            # requires python >= 3.8
+            from components.shared_memory import SharedMemoryStore
+            self.store = SharedMemoryStore()
+        self.pool = None
+        self.frozen = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        """ Resolves the shared components and forks the workers. """
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("ForkServer requires the 'fork' start method, which is unavailable on this platform")
+        if self.store is not None:
+            self.store.open()
+        self.prepare()
+        if self.store is not None:
+            for obj in self.instance_cache.instances.values():
+                self.store.publish_outputs(obj)
+        if hasattr(gc, 'freeze') and not self.frozen:
+            _freeze()
+            self.frozen = True
+        # a new process is forked from the parent for every job. With 'fork', the initializer arguments are inherited
+        # rather than pickled
+        self.pool = multiprocessing.get_context('fork').Pool(self.processes, initializer=_init_worker, initargs=(self,),
+                                                             maxtasksperchild=1)
+
+    def close(self):
+        """ Waits for running jobs and stops the workers. """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.store is not None:
+            self.store.close()
+        if self.frozen:
+            _unfreeze()
+            self.frozen = False
+
+    def prepare(self):
+        """ Resolves all shared subcomponents of `cls` with the common params. """
+        with self.instance_cache:
+            self._resolve_shared(self.cls.get_plan(), ())
+        return self.instance_cache.instances
+
+    def _resolve_shared(self, requested_params, path):
+        for requested_param in requested_params:
+            if not isinstance(requested_param, ComponentParam) or requested_param.aliases & self.params.keys():
+                # no component or explicitly provided
+                continue
+            if self.instance_cache.handles(requested_param.type):
+                # copy params because _resolve pops the ones it uses
+                requested_param.type._resolve(dict(self.params), dict(), requested_param.params,
+                                              path + (requested_param.name,))
+            else:
+                self._resolve_shared(requested_param.params, path + (requested_param.name,))
+
+    def execute(self, params):
+        """ Resolves and runs one job in the current process. """
+        all_params = dict(self.params)
+        all_params.update(params)
+        with self.instance_cache:
+            obj = self.cls.resolve(**all_params)
+        return obj.run()
+
+    def submit(self, params):
+        """ Starts a job in a new process and returns an `AsyncResult`. """
+        return self.pool.apply_async(_run_job, (params,))
+
+    def map(self, params_list):
+        """ Runs a job per item of `params_list` and returns the results in order. """
+        return self.pool.map(_run_job, params_list, chunksize=1)
@@ -0,0 +1,72 @@
+"""
+Instrumentation hooks of `Component.resolve`.
+Observers are activated per thread with a `with` statement. Without active observers, resolve only pays one lookup
+per component.
+"""
+import threading
+
+_local = threading.local()
+# observers that are active in all threads
+_global_observers = list()
+
+
+def active_observers():
+    """ Returns the list of observers that are active in this thread (falsy when there are none). """
+    if _global_observers:
+        return _global_observers + getattr(_local, 'observers', [])
+    return getattr(_local, 'observers', None)
+
+
+class ResolveObserver(object):
+    """
+    Base class of resolve instrumentation. Subclasses override the `on_*` callbacks they need.
+    Components are identified by their path: the tuple of parameter names from the resolved root component.
+    """
+
+    def __enter__(self):
+        if not hasattr(_local, 'observers'):
+            _local.observers = list()
+        _local.observers.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.observers.remove(self)
+
+    def install(self):
+        """ Activates this observer in all threads, until `uninstall` is called. """
+        global _global_observers
+        if self not in _global_observers:
+            # replace the list, so concurrent readers never see a partial update
+            _global_observers = _global_observers + [self]
+        return self
+
+    def uninstall(self):
+        """ Deactivates an observer that was activated with `install`. """
+        global _global_observers
+        _global_observers = [observer for observer in _global_observers if observer is not self]
+
+    def on_plan(self, cls, duration, cached):
+        """ Called by `resolve` after the resolution plan of `cls` was retrieved in `duration` seconds. """
+
+    def on_enter(self, cls, path):
+        """ Called before the parameters and subcomponents of component `cls` at `path` are resolved. """
+
+    def on_construct(self, cls, path):
+        """ Called right before component `cls` at `path` is constructed. """
+
+    def on_constructed(self, cls, path, obj):
+        """ Called right after component `cls` at `path` is constructed. `obj` is None if construction failed. """
+
+    def on_exit(self, cls, path, obj):
+        """ Called after component `cls` at `path` and its subcomponents are resolved (None on failure). """
+
+    def on_warning(self, cls, path, message):
+        """ Called when resolve emits a warning for component `cls` at `path`. """
+
+    def on_instance_cache(self, cls, hit):
+        """ Called when an `InstanceCache` is queried for a component of type `cls`. """
+
+
+def format_path(path):
+    """ Printable version of a component path. """
+    return ".".join(path)
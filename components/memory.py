@@ -0,0 +1,172 @@
+"""
+Per-component memory attribution of `resolve` with tracemalloc.
+"""
+import json
+import threading
+import tracemalloc
+
+from components.hooks import ResolveObserver, format_path
+
+
+class MemoryNode(object):
+    """ Net allocated bytes of one component in the resolved tree. """
+
+    def __init__(self, cls, path):
+        self.cls = cls
+        self.path = path
+        # net bytes allocated by the construction of the component itself (`__init__`)
+        self.own_bytes = 0
+        # net bytes allocated while resolving the component including its subcomponents
+        self.total_bytes = 0
+        # top allocation sites of the construction: list of (filename:lineno, bytes, count)
+        self.sites = list()
+        self.children = list()
+
+    def to_dict(self):
+        """ JSON compatible representation of this subtree. """
+        return {
+            'path': format_path(self.path),
+            'class': f"{self.cls.__module__}.{self.cls.__qualname__}",
+            'own_bytes': self.own_bytes,
+            'total_bytes': self.total_bytes,
+            'sites': [{'site': site, 'bytes': size, 'count': count} for site, size, count in self.sites],
+            'children': [child.to_dict() for child in self.children],
+        }
+
+    def walk(self):
+        """ Yields all nodes of this subtree, depth first. """
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def format(self, indent=0):
+        """ Text representation of this subtree, one line per component. """
+        line = (f"{'  ' * indent}{self.path[-1] if self.path else self.cls.__name__} ({self.cls.__name__}): "
+                f"total {_format_bytes(self.total_bytes)}, own {_format_bytes(self.own_bytes)}")
+        return "\n".join([line] + [child.format(indent + 1) for child in self.children])
+
+    def __str__(self):
+        return self.format()
+
+    def __repr__(self):
+        return f"MemoryNode({format_path(self.path) or self.cls.__name__})"
+
+
+def _format_bytes(size):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class MemoryProfiler(ResolveObserver):
+    """
+    Attributes the memory allocated during `resolve` to the components that were constructed.
+    Starts tracemalloc if it isn't tracing yet (and stops it again on exit). With `top_sites` > 0, snapshots are taken
+    around every construction to record its top allocation sites, which is considerably slower.
+    Allocations of other threads during resolve are attributed as well.
+    Use as context manager: `with MemoryProfiler() as profiler: Comp.resolve()`, then `print(profiler.tree)`.
+    With `install()`, resolves in all threads are recorded (each in its own tree) until `uninstall()`.
+    """
+
+    def __init__(self, top_sites=0, frames=1):
+        self.top_sites = top_sites
+        self.frames = frames
+        self.trees = list()
+        # stack of the components being resolved, per thread
+        self._local = threading.local()
+        self._started = False
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = list()
+        return stack
+
+    def _start_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+
+    def _stop_tracing(self):
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def __enter__(self):
+        self._start_tracing()
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        super().__exit__(exc_type, exc_val, exc_tb)
+        self._stop_tracing()
+
+    def install(self):
+        self._start_tracing()
+        return super().install()
+
+    def uninstall(self):
+        super().uninstall()
+        self._stop_tracing()
+
+    @property
+    def tree(self):
+        """ Memory tree (root `MemoryNode`) of the last resolve. """
+        return self.trees[-1] if self.trees else None
+
+    def largest(self, n=10):
+        """ The `n` components of the last resolve with the most bytes allocated by their own construction. """
+        if self.tree is None:
+            return []
+        return sorted(self.tree.walk(), key=lambda node: node.own_bytes, reverse=True)[:n]
+
+    def to_json(self, **kwargs):
+        """ Exports the trees of all resolves as JSON. """
+        return json.dumps([tree.to_dict() for tree in self.trees], **kwargs)
+
+    @staticmethod
+    def _snapshot():
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+
+    def on_enter(self, cls, path):
+        # node, memory at start of resolve, memory and snapshot at start of construction
+        self._stack.append([MemoryNode(cls, path), tracemalloc.get_traced_memory()[0], None, None])
+
+    def on_construct(self, cls, path):
+        entry = self._stack[-1]
+        if self.top_sites > 0:
+            entry[3] = self._snapshot()
+        entry[2] = tracemalloc.get_traced_memory()[0]
+
+    def on_constructed(self, cls, path, obj):
+        current = tracemalloc.get_traced_memory()[0]
+        entry = self._stack[-1]
+        node, _, start, snapshot = entry
+        node.own_bytes = current - start
+        if snapshot is not None:
+            stats = self._snapshot().compare_to(snapshot, 'lineno')
+            node.sites = [(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size_diff,
+                           stat.count_diff) for stat in stats[:self.top_sites] if stat.size_diff != 0]
+            entry[3] = None
+
+    def on_exit(self, cls, path, obj):
+        stack = self._stack
+        node, start, _, _ = stack.pop()
+        node.total_bytes = tracemalloc.get_traced_memory()[0] - start
+        if stack:
+            stack[-1][0].children.append(node)
+        else:
+            self.trees.append(node)
+
+
+def memory_resolve(cls, top_sites=0, **params):
+    """ Resolves `cls` with `params` and returns the object and its memory tree. """
+    with MemoryProfiler(top_sites=top_sites) as profiler:
+        obj = cls.resolve(**params)
+    return obj, profiler.tree
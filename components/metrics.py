@@ -0,0 +1,236 @@
+"""
+In-process metrics of dependency injection: resolve counts, cache hits and misses, resolve latencies and warnings.
+Metrics are exported in the Prometheus text format.
+
+Counters and histograms are sharded per thread: every thread only writes its own shard (without locks), and shards
+are summed when the metrics are read.
+"""
+import bisect
+import os
+import threading
+import time
+
+from components.hooks import ResolveObserver
+
+# default buckets of latency histograms, in seconds
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1., 5., 10., 60.)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if isinstance(value, float) and value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(object):
+    """ Base class of sharded metrics with label values as keys. """
+    type = None
+
+    def __init__(self, name, help="", labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._shards = list()
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = dict()
+            self._local.shard = shard
+            # only registering a new thread's shard takes the lock
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _key(self, labels):
+        if len(labels) != len(self.labels):
+            raise ValueError(f"Metric {self.name} expects labels {self.labels}, got {labels}")
+        return tuple(labels)
+
+    def _snapshots(self):
+        with self._lock:
+            shards = list(self._shards)
+        # copying a dict is atomic with respect to other threads
+        return [dict(shard) for shard in shards]
+
+    def header(self):
+        return f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.type}\n"
+
+
+class Counter(_Metric):
+    """ Monotonically increasing counter. """
+    type = "counter"
+
+    def inc(self, *labels, value=1):
+        """ Increments the counter with the given label values. """
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def values(self):
+        """ Returns a dict from label values to the total count. """
+        totals = dict()
+        for shard in self._snapshots():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def get(self, *labels):
+        return self.values().get(tuple(labels), 0)
+
+    def to_prometheus(self):
+        lines = [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                 for key, value in sorted(self.values().items())]
+        return self.header() + "".join(line + "\n" for line in lines)
+
+
+class Histogram(_Metric):
+    """ Histogram of observed values, e.g. latencies. """
+    type = "histogram"
+
+    def __init__(self, name, help="", labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        """ Records a value with the given label values. """
+        shard = self._shard()
+        key = self._key(labels)
+        entry = shard.get(key)
+        if entry is None:
+            # counts per bucket (last one is +Inf), sum, count
+            entry = [[0] * (len(self.buckets) + 1), 0., 0]
+            shard[key] = entry
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def values(self):
+        """ Returns a dict from label values to (bucket counts, sum, count). Bucket counts are not cumulative. """
+        totals = dict()
+        for shard in self._snapshots():
+            for key, (counts, total, count) in shard.items():
+                if key not in totals:
+                    totals[key] = [[0] * len(counts), 0., 0]
+                entry = totals[key]
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+        return {key: tuple(value) for key, value in totals.items()}
+
+    def to_prometheus(self):
+        lines = list()
+        for key, (counts, total, count) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, [('le', _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return self.header() + "".join(line + "\n" for line in lines)
+
+
+class MetricsRegistry(object):
+    """ Collection of metrics that can be exported together. """
+
+    def __init__(self):
+        self.metrics = dict()
+        self._lock = threading.Lock()
+
+    def _get_or_add(self, metric):
+        with self._lock:
+            existing = self.metrics.get(metric.name)
+            if existing is None:
+                self.metrics[metric.name] = metric
+                return metric
+        if type(existing) != type(metric):
+            raise ValueError(f"Metric {metric.name} already registered as {existing.type}")
+        return existing
+
+    def counter(self, name, help="", labels=()):
+        """ Returns the counter with this name, creating it if needed. """
+        return self._get_or_add(Counter(name, help, labels))
+
+    def histogram(self, name, help="", labels=(), buckets=LATENCY_BUCKETS):
+        """ Returns the histogram with this name, creating it if needed. """
+        return self._get_or_add(Histogram(name, help, labels, buckets))
+
+    def to_prometheus(self):
+        """ Returns all metrics in the Prometheus text exposition format. """
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return "".join(metric.to_prometheus() for metric in metrics)
+
+    def write(self, path):
+        """ Writes all metrics in the Prometheus text format to `path` (atomically, e.g. for node_exporter). """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+def _class_name(cls):
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+class ResolveMetrics(ResolveObserver):
+    """
+    Collects resolve metrics in `registry`.
+    Activate it for all threads with `install()` (e.g. in a long-running service) or for one thread with `with`.
+    """
+
+    def __init__(self, registry=None, prefix="components"):
+        self.registry = MetricsRegistry() if registry is None else registry
+        self.resolves = self.registry.counter(f"{prefix}_resolves_total", "Number of resolve calls per component.",
+                                              ["component"])
+        self.components = self.registry.counter(f"{prefix}_components_total",
+                                                "Number of resolved components per class, including instances "
+                                                "reused from an instance cache.", ["component"])
+        self.plan_cache = self.registry.counter(f"{prefix}_plan_cache_total",
+                                                "Resolution plan cache lookups.", ["component", "result"])
+        self.instance_cache = self.registry.counter(f"{prefix}_instance_cache_total",
+                                                    "Instance cache lookups.", ["component", "result"])
+        self.warnings = self.registry.counter(f"{prefix}_resolve_warnings_total",
+                                              "Warnings emitted by resolve.", ["component"])
+        self.latency = self.registry.histogram(f"{prefix}_resolve_duration_seconds",
+                                               "Duration of resolve calls.", ["component"])
+        self._local = threading.local()
+
+    def on_plan(self, cls, duration, cached):
+        name = _class_name(cls)
+        self.resolves.inc(name)
+        self.plan_cache.inc(name, "hit" if cached else "miss")
+
+    def on_enter(self, cls, path):
+        if not path:
+            starts = getattr(self._local, 'starts', None)
+            if starts is None:
+                starts = self._local.starts = list()
+            starts.append(time.perf_counter())
+
+    def on_constructed(self, cls, path, obj):
+        if obj is not None:
+            self.components.inc(_class_name(cls))
+
+    def on_exit(self, cls, path, obj):
+        if not path:
+            start = self._local.starts.pop()
+            self.latency.observe(time.perf_counter() - start, _class_name(cls))
+
+    def on_warning(self, cls, path, message):
+        self.warnings.inc(_class_name(cls))
+
+    def on_instance_cache(self, cls, hit):
+        self.instance_cache.inc(_class_name(cls), "hit" if hit else "miss")
@@ -6,6 +6,10 @@ class Param(object):
         self.name = name
         self.type = tpe
         self.default = default
+        # checks values of this parameter, compiled into the resolution plan (see `Component.get_plan`)
+        self.validator = None
+        # converts values (e.g. strings) to the type of this parameter, see `components.coercion`
+        self.converter = None
         # aliases need to be unique within the component hierarchy. ComponentParam.enforce_consistency() checks this.
         if aliases is None:
             self.aliases = {self.name}
@@ -0,0 +1,83 @@
+"""
+Parameter-only pickling of components.
+Components that inherit from `ParamPickling` are pickled as their class and parameters (`get_params()`) and are
+resolved again with those parameters when unpickled, instead of pickling their whole `__dict__` (e.g. fitted models or
+loaded data).
+
+Large state that should be transferred anyway can be returned by `get_shared_state`. With pickle protocol 5, bytes-like
+values (and objects that support out-of-band pickling themselves, such as NumPy arrays) are then transferred as
+out-of-band buffers, see `dumps` and `loads`.
+"""
+import pickle
+
+# out-of-band buffers require pickle protocol 5 (python >= 3.8)
+PickleBuffer = getattr(pickle, 'PickleBuffer', None)
+PROTOCOL = 5 if PickleBuffer is not None else pickle.HIGHEST_PROTOCOL
+
+_BYTES_TYPES = (bytes, bytearray, memoryview)
+
+
+def _wrap(value, protocol):
+    """ Wraps bytes-like values in a PickleBuffer, so they can be pickled out-of-band. """
+    if PickleBuffer is not None and protocol >= 5 and type(value) in _BYTES_TYPES:
+        return type(value).__name__, PickleBuffer(value)
+    return None, value
+
+
+def _unwrap(kind, value):
+    """ Restores the type of a value that was wrapped by `_wrap`. """
+    if kind is None or type(value).__name__ == kind:
+        return value
+    if kind == 'memoryview':
+        return memoryview(value)
+    if kind == 'bytearray':
+        return bytearray(value)
+    return bytes(value)
+
+
+def _rebuild(cls, params, state):
+    """ Resolves a component with its parameters, through its resolution plan, and restores its shared state. """
+    obj = cls.resolve(**params)
+    if state:
+        obj.set_shared_state({name: _unwrap(kind, value) for name, (kind, value) in state.items()})
+    return obj
+
+
+class ParamPickling(object):
+    """
+    Mixin for components that are pickled as their parameters: `class Model(Component, ParamPickling)`.
+    The component is resolved with its parameters (calling `__init__`) when unpickled. Subcomponents are passed as
+    objects, so they are unpickled (and resolved, if they are `ParamPickling` too) first.
+    """
+
+    def get_shared_state(self):
+        """ Returns a dict with attributes that are pickled together with the parameters, e.g. large arrays. """
+        return dict()
+
+    def set_shared_state(self, state):
+        """ Restores the attributes returned by `get_shared_state` after construction. """
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __reduce_ex__(self, protocol):
+        state = {name: _wrap(value, protocol) for name, value in self.get_shared_state().items()}
+        return _rebuild, (type(self), self.get_params(), state)
+
+
+def dumps(obj, protocol=PROTOCOL):
+    """
+    Pickles `obj`, with out-of-band buffers if the protocol supports them.
+    Returns the pickled bytes and a list of buffers (which are not copied), to be passed to `loads`.
+    """
+    if protocol < 5:
+        return pickle.dumps(obj, protocol=protocol), []
+    buffers = list()
+    data = pickle.dumps(obj, protocol=protocol, buffer_callback=buffers.append)
+    return data, buffers
+
+
+def loads(data, buffers=()):
+    """ Unpickles data returned by `dumps`. """
+    if PickleBuffer is None:
+        return pickle.loads(data)
+    return pickle.loads(data, buffers=buffers)
@@ -0,0 +1,315 @@
+"""
+Streaming pipelines of components.
+A `Pipeline` passes a stream of items through its stages, which are resolved as `Tuple[...]` component list:
+
+    class Tokenize(Stage):
+        def process_item(self, line):
+            return line.split()
+
+    class TextPipeline(Pipeline):
+        stages: Tuple[Tokenize, Count]
+
+Items are passed between stages in batches of `batch_size`. Without `queue_size`, stages are chained generators in the
+calling thread. With `queue_size`, every stage runs in its own thread, connected by bounded queues of `queue_size`
+batches, so a fast stage blocks (backpressure) instead of buffering the whole stream.
+Stage parameters are addressed with the normal aliases, e.g. `stages_0_lowercase` or just `lowercase`.
+
+Every stage can run its batches in parallel with its `executor` parameter ("inline", "thread" or "process") and
+`workers`, e.g. `stages_1_executor="process", stages_1_workers=4`. With `ordered` (default), the output batches keep
+the order of the input batches.
+"""
+import collections
+import concurrent.futures
+import itertools
+import queue
+import sys
+import threading
+import time
+from typing import Tuple
+
+from components.component import Component
+
+
+def batched(items, size):
+    """ Groups an iterable in lists of (at most) `size` items. """
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+EXECUTORS = ("inline", "thread", "process")
+
+
+class Stage(Component):
+    """
+    Stage of a `Pipeline`. Subclasses implement `process_item` (one output per item), `process` (stream of items to
+    stream of items, e.g. to filter or to keep state) or `process_batches` (stream of batches to stream of batches).
+
+    `executor` determines how batches are processed: "inline" in the pipeline's thread, or in parallel by a pool of
+    `workers` threads ("thread") or processes ("process"). Parallel stages process every batch independently, so
+    state isn't shared across batches. The pipeline reads the attributes `executor`, `workers` and `ordered` of the
+    stage, with the defaults of `Stage.__init__` if they aren't set. Stages with their own `__init__` declare these
+    parameters and pass them on to support configuring them: `def __init__(self, lowercase: bool = False,
+    executor: str = "inline", workers: int = 1)` calling `super().__init__(executor, workers)`, or set the attributes.
+    """
+
+    def __init__(self, executor: str = "inline", workers: int = 1, ordered: bool = True):
+        self.executor = executor
+        self.workers = workers
+        self.ordered = ordered
+
+    def process_item(self, item):
+        raise NotImplementedError(f"{self.name} should implement process_item, process or process_batches")
+
+    def process(self, items):
+        """ Consumes an iterator of items and yields the output items. """
+        for item in items:
+            yield self.process_item(item)
+
+    def process_batches(self, batches, batch_size):
+        """ Consumes an iterator of batches (lists) and yields batches of (at most) `batch_size` output items. """
+        return batched(self.process(itertools.chain.from_iterable(batches)), batch_size)
+
+
+class StageStats(object):
+    """ Throughput counters of one stage. Times are in seconds. """
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.batches_in = 0
+        self.batches_out = 0
+        # time spent in the stage itself, excluding waiting for input and for space in the output queue
+        # (summed over the workers of parallel stages)
+        self.busy_time = 0.
+
+    @property
+    def throughput(self):
+        """ Output items per second of busy time. """
+        return self.items_out / self.busy_time if self.busy_time > 0 else 0.
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'batches_in': self.batches_in,
+            'batches_out': self.batches_out,
+            'busy_time': self.busy_time,
+            'throughput': self.throughput,
+        }
+
+    def __repr__(self):
+        return (f"StageStats({self.name}: {self.items_in} in, {self.items_out} out, "
+                f"{self.throughput:.1f} items/s)")
+
+
+# marks the end of a stream in a queue
+_END = object()
+
+
+class _Failure(object):
+    """ Passes an exception of a stage thread downstream. """
+
+    def __init__(self, exception):
+        self.exception = exception
+
+
+# stage of a process pool worker, see `_init_worker`
+_worker_stage = None
+
+
+def _init_worker(stage):
+    global _worker_stage
+    _worker_stage = stage
+
+
+def _process_batch(stage, batch, batch_size):
+    """ Processes one batch by `stage` (or the stage of this worker process) and returns the output and duration. """
+    stage = _worker_stage if stage is None else stage
+    start = time.perf_counter()
+    output = list(stage.process_batches(iter([batch]), batch_size))
+    return output, time.perf_counter() - start
+
+
+class Pipeline(Stage):
+    """
+    Passes a stream of items through `stages`, see `components.pipeline`.
+    `stats` contains the `StageStats` of every stage for the last (or current) stream.
+    A pipeline is itself a `Stage`, so pipelines can be nested. Nested pipelines run inline in their parent.
+    """
+
+    def __init__(self, stages: Tuple[Component, ...], batch_size: int = 1, queue_size: int = 0):
+        self.stages = stages
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.stats = list()
+
+    def process(self, items):
+        """ Yields the output items of the last stage for the input `items`. """
+        batches = self.process_batches(batched(items, self.batch_size), self.batch_size)
+        try:
+            for batch in batches:
+                yield from batch
+        finally:
+            # stops the stage threads when the stream isn't consumed completely
+            batches.close()
+
+    def process_batches(self, batches, batch_size):
+        self.stats = [StageStats(f"{index}:{stage.name}") for index, stage in enumerate(self.stages)]
+        if self.queue_size > 0:
+            return self._threaded(batches)
+        for index in range(len(self.stages)):
+            batches = self._stage_stream(index, batches)
+        return batches
+
+    def run(self, items):
+        """ Passes all `items` through the pipeline and returns the output as list. """
+        return list(self.process(items))
+
+    def _stage_stream(self, index, batches):
+        """ Runs stage `index` on `batches` with its executor. """
+        stage, stats = self.stages[index], self.stats[index]
+        executor = getattr(stage, 'executor', "inline")
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor!r} of stage {stats.name}, expected one of {EXECUTORS}")
+        if executor == "inline":
+            return self._measured(stage, stats, batches)
+        return self._parallel(stage, stats, batches, executor, getattr(stage, 'workers', 1),
+                              getattr(stage, 'ordered', True))
+
+    def _parallel(self, stage, stats, batches, executor, workers, ordered):
+        """ Processes `batches` by a pool of workers, with at most two batches per worker in progress. """
+        if executor == "thread":
+            pool = concurrent.futures.ThreadPoolExecutor(workers)
+        elif sys.version_info >= (3, 7):
+            pool = concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stage,))
+            # the stage is sent once per worker process
+            stage = None
+        else:
+            # python 3.6 has no initializer, the stage is sent with every batch
+            pool = concurrent.futures.ProcessPoolExecutor(workers)
+        pending = collections.deque() if ordered else set()
+
+        def completed():
+            if ordered:
+                future = pending.popleft()
+            else:
+                future = next(iter(concurrent.futures.wait(pending, return_when='FIRST_COMPLETED').done))
+                pending.remove(future)
+            output, duration = future.result()
+            stats.busy_time += duration
+            for batch in output:
+                stats.batches_out += 1
+                stats.items_out += len(batch)
+                yield batch
+
+        try:
+            for batch in batches:
+                stats.batches_in += 1
+                stats.items_in += len(batch)
+                future = pool.submit(_process_batch, stage, batch, self.batch_size)
+                if ordered:
+                    pending.append(future)
+                else:
+                    pending.add(future)
+                if len(pending) >= 2 * workers:
+                    yield from completed()
+            while pending:
+                yield from completed()
+        finally:
+            # on errors or when the stream is closed: cancel the batches that didn't start
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def _measured(self, stage, stats, batches):
+        """ Runs `stage` on `batches`, counting items and the time spent in the stage. """
+        waiting = [0.]
+
+        def counted(batches):
+            iterator = iter(batches)
+            while True:
+                start = time.perf_counter()
+                batch = next(iterator, _END)
+                waiting[0] += time.perf_counter() - start
+                if batch is _END:
+                    return
+                stats.batches_in += 1
+                stats.items_in += len(batch)
+                yield batch
+
+        output = iter(stage.process_batches(counted(batches), self.batch_size))
+        while True:
+            waiting[0] = 0.
+            start = time.perf_counter()
+            batch = next(output, _END)
+            stats.busy_time += time.perf_counter() - start - waiting[0]
+            if batch is _END:
+                return
+            stats.batches_out += 1
+            stats.items_out += len(batch)
+            yield batch
+
+    def _threaded(self, batches):
+        """ Runs every stage in a thread, connected by bounded queues. """
+        stop = threading.Event()
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        def put(q, value):
+            # a timeout, so threads notice when the consumer stopped
+            while not stop.is_set():
+                try:
+                    q.put(value, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def read(q):
+            while True:
+                value = q.get()
+                if value is _END:
+                    return
+                if isinstance(value, _Failure):
+                    raise value.exception
+                yield value
+
+        def feed():
+            try:
+                for batch in batches:
+                    if not put(queues[0], batch):
+                        return
+                put(queues[0], _END)
+            except BaseException as e:
+                put(queues[0], _Failure(e))
+
+        def work(index):
+            try:
+                for batch in self._stage_stream(index, read(queues[index])):
+                    if not put(queues[index + 1], batch):
+                        return
+                put(queues[index + 1], _END)
+            except BaseException as e:
+                put(queues[index + 1], _Failure(e))
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        threads += [threading.Thread(target=work, args=(index,), daemon=True) for index in range(len(self.stages))]
+        for thread in threads:
+            thread.start()
+        try:
+            yield from read(queues[-1])
+        finally:
+            stop.set()
+            # unblock threads that wait for input
+            for q in queues:
+                try:
+                    q.put_nowait(_END)
+                except queue.Full:
+                    pass
+            for thread in threads:
+                thread.join()
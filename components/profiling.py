@@ -0,0 +1,116 @@
+"""
+Profiling of commands: `resolve` and `run()` are profiled with cProfile as separately labeled phases.
+"""
+import cProfile
+import inspect
+import io
+import pstats
+import sys
+
+from components.component import Component
+
+PHASES = ('resolve', 'run')
+
+
+def _all_subclasses(cls):
+    result = list()
+    for sub in cls.__subclasses__():
+        result.append(sub)
+        result += _all_subclasses(sub)
+    return result
+
+
+def method_owners():
+    """ Returns a dict mapping the pstats key (filename, line, name) of every Component method to its owning class. """
+    owners = dict()
+    for cls in [Component] + _all_subclasses(Component):
+        for attr in vars(cls).values():
+            if isinstance(attr, (classmethod, staticmethod)):
+                attr = attr.__func__
+            elif isinstance(attr, property):
+                attr = attr.fget
+            attr = inspect.unwrap(attr) if callable(attr) else attr
+            code = getattr(attr, '__code__', None)
+            if code is not None:
+                owners[(code.co_filename, code.co_firstlineno, code.co_name)] = cls
+    return owners
+
+
+def component_times(stats):
+    """
+    Attributes profiled time to the Component classes that own the called methods.
+    Returns a list of dicts with the class `name`, number of method `calls`, `tottime` (time spent in the methods
+    themselves) and `cumtime` (time including callees, not counting calls between methods of the same class),
+    sorted by cumtime.
+    """
+    owners = method_owners()
+    totals = dict()
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        cls = owners.get(func)
+        if cls is None:
+            continue
+        total = totals.setdefault(cls, {'name': cls.__qualname__, 'module': cls.__module__,
+                                        'calls': 0, 'tottime': 0., 'cumtime': 0.})
+        total['calls'] += nc
+        total['tottime'] += tt
+        if not callers:
+            total['cumtime'] += ct
+        for caller, caller_stats in callers.items():
+            if owners.get(caller) is not cls:
+                # caller_stats: (cc, nc, tt, ct) of this edge
+                total['cumtime'] += caller_stats[3]
+    return sorted(totals.values(), key=lambda t: t['cumtime'], reverse=True)
+
+
+def profile_command(cls, params):
+    """ Profiles `cls.resolve(**params)` and `run()` of the result. Returns a dict from phase to `pstats.Stats`. """
+    profiles = {phase: cProfile.Profile() for phase in PHASES}
+    profiles['resolve'].enable()
+    try:
+        obj = cls.resolve(**params)
+    finally:
+        profiles['resolve'].disable()
+    profiles['run'].enable()
+    try:
+        obj.run()
+    finally:
+        profiles['run'].disable()
+    return {phase: pstats.Stats(profile) for phase, profile in profiles.items()}
+
+
+def summary(stats, top=20, sort='cumulative'):
+    """
+    Returns a text summary of the profiled phases with the `top` entries.
+    `sort` is a pstats sort key (e.g. 'cumulative', 'tottime') or 'component' to aggregate per Component class.
+    """
+    out = io.StringIO()
+    for phase, phase_stats in stats.items():
+        out.write(f"===== {phase} =====\n")
+        if sort == 'component':
+            out.write(f"{'cumtime':>10s} {'tottime':>10s} {'calls':>8s}  component\n")
+            for total in component_times(phase_stats)[:top]:
+                out.write(f"{total['cumtime']:10.6f} {total['tottime']:10.6f} {total['calls']:8d}  "
+                          f"{total['module']}.{total['name']}\n")
+        else:
+            phase_stats.stream = out
+            phase_stats.sort_stats(sort).print_stats(top)
+    return out.getvalue()
+
+
+def write(stats, prefix):
+    """ Writes a `<prefix>.<phase>.prof` file per phase. Returns the paths. """
+    paths = list()
+    for phase, phase_stats in stats.items():
+        path = f"{prefix}.{phase}.prof"
+        phase_stats.dump_stats(path)
+        paths.append(path)
+    return paths
+
+
+def report(stats, prefix=None, top=20, sort='cumulative', file=None):
+    """ Prints the summary and writes the .prof files if `prefix` is given. """
+    file = sys.stderr if file is None else file
+    file.write(summary(stats, top, sort))
+    if prefix is not None:
+        for path in write(stats, prefix):
+            print(f"profile written to {path}", file=file)
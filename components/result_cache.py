@@ -0,0 +1,224 @@
+"""
+Persistent cache of the results of component methods.
+
+    class DataSource(Component):
+        @cached_method(".cache", max_bytes=2 ** 30, salt="v2")
+        def load_data(self):
+            ...
+
+A result is stored under a key that combines the configuration of the component, the name of the method, the arguments
+and the salt, which can be changed when the code of the method changes. Keys are the same in every interpreter run
+(see `stable_key`), so results are only cached for arguments and parameters with a stable representation.
+NumPy arrays are stored as .npy files and large ones are read memory-mapped (read-only), other results are pickled.
+"""
+import enum
+import functools
+import hashlib
+import json
+import os
+import pickle
+import types
+
+from components.component import Component
+
+PICKLE_SUFFIX = ".pkl"
+NUMPY_SUFFIX = ".npy"
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+_SCALARS = (type(None), bool, int, float, complex, str, bytes)
+
+
+def _qualified_name(value):
+    return f"{value.__module__}.{value.__qualname__}"
+
+
+def stable_key(value):
+    """
+    Returns a JSON compatible description of `value` that doesn't depend on the interpreter run, unlike `repr` (e.g.
+    the order of sets depends on PYTHONHASHSEED and the default repr contains the memory address).
+    Supports scalars, components, enums, classes and functions, NumPy arrays, and tuples, lists, sets and dicts of
+    these. Other values are described by their repr if their class defines `__repr__` and it doesn't contain a memory
+    address, otherwise a TypeError is raised.
+    """
+    if isinstance(value, _SCALARS):
+        return [type(value).__name__, repr(value)]
+    if isinstance(value, Component):
+        params = [[name, stable_key(param)] for name, param in sorted(value.get_params().items())]
+        return [_qualified_name(type(value)), params]
+    if isinstance(value, enum.Enum):
+        return [_qualified_name(type(value)), value.name]
+    if isinstance(value, (list, tuple)):
+        return [type(value).__name__, [stable_key(item) for item in value]]
+    if isinstance(value, (set, frozenset)):
+        items = sorted(json.dumps(stable_key(item)) for item in value)
+        return [type(value).__name__, items]
+    if isinstance(value, dict):
+        items = sorted([json.dumps(stable_key(k)), stable_key(v)] for k, v in value.items())
+        return [type(value).__name__, items]
+    if isinstance(value, type):
+        return ["type", _qualified_name(value)]
+    if isinstance(value, (types.FunctionType, types.BuiltinFunctionType)):
+        if "<lambda>" in value.__qualname__:
+            raise TypeError(f"Lambda functions have no stable representation: {value!r}")
+        return ["function", _qualified_name(value)]
+    numpy = _numpy()
+    if numpy is not None and isinstance(value, numpy.ndarray) and not value.dtype.hasobject:
+        digest = hashlib.sha256(numpy.ascontiguousarray(value).tobytes()).hexdigest()
+        return ["ndarray", value.dtype.str, list(value.shape), digest]
+    text = repr(value)
+    # e.g. "<Model object at 0x7f...>"
+    if type(value).__repr__ is object.__repr__ or " at 0x" in text:
+        raise TypeError(f"Value of type {type(value).__name__} has no stable representation: {text}")
+    return [_qualified_name(type(value)), text]
+
+
+class ResultCache(object):
+    """
+    Directory with cached results. With `max_bytes`, the least recently used results are removed when the total size
+    exceeds it. NumPy arrays of at least `mmap_bytes` are read memory-mapped.
+    """
+
+    def __init__(self, directory, max_bytes=None, mmap_bytes=2 ** 20):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.mmap_bytes = mmap_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(obj, name, args=(), kwargs=None, salt=""):
+        """
+        Returns the key of the result of method `name` of component `obj` called with `args` and `kwargs`.
+        Raises a TypeError if the component or the arguments have no stable representation (see `stable_key`).
+        """
+        try:
+            description = stable_key([obj, name, list(args), kwargs or {}, salt])
+        except TypeError as e:
+            raise TypeError(f"Result of {name} can't be cached: {e}") from e
+        return hashlib.sha256(json.dumps(description).encode()).hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key):
+        """ Returns (True, result) if a result with `key` is cached, otherwise (False, None). """
+        for suffix in (NUMPY_SUFFIX, PICKLE_SUFFIX):
+            path = self._path(key, suffix)
+            try:
+                value = self._read(path, suffix)
+            except FileNotFoundError:
+                continue
+            # the modification time marks the last use, for LRU eviction
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return True, value
+        self.misses += 1
+        return False, None
+
+    def _read(self, path, suffix):
+        if suffix == NUMPY_SUFFIX:
+            large = os.path.getsize(path) >= self.mmap_bytes
+            return _numpy().load(path, mmap_mode='r' if large else None, allow_pickle=False)
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def put(self, key, value):
+        """ Stores `value` under `key` (atomically) and evicts old results if the cache is too large. """
+        numpy = _numpy()
+        suffix = NUMPY_SUFFIX if numpy is not None and type(value) == numpy.ndarray and not value.dtype.hasobject \
+            else PICKLE_SUFFIX
+        path = self._path(key, suffix)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                if suffix == NUMPY_SUFFIX:
+                    numpy.save(f, value, allow_pickle=False)
+                else:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        if self.max_bytes is not None:
+            self.evict(self.max_bytes)
+
+    def entries(self):
+        """ Returns a list of (path, size, last use) of all cached results. """
+        entries = list()
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((PICKLE_SUFFIX, NUMPY_SUFFIX)):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def size(self):
+        """ Total size of the cached results in bytes. """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes):
+        """ Removes the least recently used results until the total size is at most `max_bytes`. """
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        self.evict(0)
+
+
+def cached_method(cache, max_bytes=None, salt=""):
+    """
+    Decorator that caches the results of a component method in `cache` (a `ResultCache` or a directory).
+    `max_bytes` applies to a directory, a `ResultCache` has its own. Results of calls with arguments or parameters
+    without a stable representation are not cached.
+    """
+    if isinstance(cache, ResultCache) and max_bytes is not None:
+        raise ValueError("max_bytes can't be used with a ResultCache, set the max_bytes of the cache instead")
+
+    def decorator(method):
+        # the cache directory is only created when the method is called
+        caches = list()
+
+        def get_cache():
+            if not caches:
+                caches.append(cache if isinstance(cache, ResultCache) else ResultCache(cache, max_bytes=max_bytes))
+            return caches[0]
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            result_cache = get_cache()
+            try:
+                key = result_cache.key(self, method.__name__, args, kwargs, salt)
+            except TypeError:
+                return method(self, *args, **kwargs)
+            found, value = result_cache.get(key)
+            if found:
+                return value
+            value = method(self, *args, **kwargs)
+            result_cache.put(key, value)
+            return value
+
+        wrapper.get_cache = get_cache
+        return wrapper
+    return decorator
@@ -0,0 +1,174 @@
+"""
+Shared-memory handoff of large component outputs to worker processes.
+Methods decorated with `shared_output` return a buffer (bytes-like or NumPy array). While a `SharedMemoryStore` is
+active, the first call in the process that owns the store copies the output into a `multiprocessing.shared_memory`
+block. Calls in worker processes (for a component with the same configuration) return a zero-copy, read-only view of
+that block instead of computing the output again. While a store is active, every call returns a read-only view: a
+memoryview of bytes or a NumPy array. Stores require Python 3.8, `shared_output` can be used with any version.
+"""
+import functools
+import hashlib
+import os
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # python < 3.8
+    shared_memory = None
+
+from components.component import structural_key
+
+# store of this process, inherited by forked workers (see `SharedMemoryStore.attach` for other start methods)
+_store = None
+
+
+def active_store():
+    """ Returns the `SharedMemoryStore` that is active in this process or None. """
+    return _store
+
+
+def output_key(obj, name):
+    """ Key of the output of method `name` of component `obj`, which is the same in every process. """
+    return hashlib.sha1(repr((structural_key(obj), name)).encode()).hexdigest()
+
+
+def shared_output(method):
+    """
+    Decorator of component methods without arguments that return a large buffer, e.g. `load_data`.
+    The output is published to or read from the active `SharedMemoryStore`.
+    """
+    @functools.wraps(method)
+    def wrapper(self):
+        store = active_store()
+        if store is None:
+            return method(self)
+        key = output_key(self, method.__name__)
+        view = store.get(key)
+        if view is not None:
+            return view
+        value = method(self)
+        if store.is_owner:
+            store.publish(key, value)
+            return store.get(key)
+        return _readonly(value)
+
+    wrapper.shared_output = True
+    return wrapper
+
+
+def shared_output_names(cls):
+    """ Names of the methods of `cls` that are decorated with `shared_output`. """
+    return [name for name in dir(cls) if getattr(getattr(cls, name, None), 'shared_output', False)]
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _readonly(value):
+    """ Read-only view of a bytes-like object or NumPy array, of the same type as the views of published outputs. """
+    numpy = _numpy()
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    return memoryview(value).cast('B').toreadonly()
+
+
+class SharedMemoryStore(object):
+    """
+    Shared memory blocks with the outputs of components, owned by the process that created the store.
+    Use as context manager (or `open` and `close`): blocks are removed when the store is closed.
+    `descriptors` maps output keys to (block name, kind, size, dtype, shape) and can be passed to processes that
+    weren't forked with `SharedMemoryStore.attach(descriptors)`.
+    """
+
+    def __init__(self, descriptors=None):
+        if shared_memory is None:
+            raise RuntimeError("SharedMemoryStore requires Python 3.8 or later")
+        self.descriptors = dict() if descriptors is None else dict(descriptors)
+        self.owner = os.getpid()
+        # blocks created by this store (owner) or attached to (workers)
+        self.blocks = dict()
+        self.views = dict()
+
+    @property
+    def is_owner(self):
+        return os.getpid() == self.owner
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self):
+        """ Activates this store in this process (and in processes forked from it). """
+        global _store
+        _store = self
+        return self
+
+    def close(self):
+        """ Deactivates the store and, in the owning process, removes its shared memory blocks. """
+        global _store
+        if _store is self:
+            _store = None
+        self.views.clear()
+        if not self.is_owner:
+            return
+        for block in self.blocks.values():
+            try:
+                block.close()
+            except BufferError:
+                # views are still referenced, the memory is released when they are
+                pass
+            block.unlink()
+        self.blocks.clear()
+        self.descriptors.clear()
+
+    @classmethod
+    def attach(cls, descriptors):
+        """ Activates a store with the blocks described by `descriptors` in a worker process. """
+        store = cls(descriptors)
+        store.owner = None
+        return store.open()
+
+    def publish(self, key, value):
+        """ Copies a bytes-like object or NumPy array into a new shared memory block. """
+        numpy = _numpy()
+        if numpy is not None and isinstance(value, numpy.ndarray):
+            array = numpy.ascontiguousarray(value)
+            data = memoryview(array).cast('B') if array.size else b""
+            descriptor = ("numpy", array.nbytes, array.dtype.str, array.shape)
+        else:
+            data = memoryview(value).cast('B')
+            descriptor = ("bytes", data.nbytes, None, None)
+        # blocks can't be empty
+        block = shared_memory.SharedMemory(create=True, size=max(descriptor[1], 1))
+        block.buf[:descriptor[1]] = data
+        self.blocks[key] = block
+        self.descriptors[key] = (block.name,) + descriptor
+
+    def get(self, key):
+        """ Returns a read-only view of the output with `key` or None if it wasn't published. """
+        view = self.views.get(key)
+        if view is not None or key not in self.descriptors:
+            return view
+        name, kind, size, dtype, shape = self.descriptors[key]
+        block = self.blocks.get(key)
+        if block is None:
+            block = self.blocks[key] = shared_memory.SharedMemory(name=name)
+        view = block.buf[:size].toreadonly()
+        if kind == "numpy":
+            view = _numpy().frombuffer(view, dtype=dtype).reshape(shape)
+        self.views[key] = view
+        return view
+
+    def publish_outputs(self, obj):
+        """ Calls the shared output methods of component `obj`, so their outputs are published. """
+        for name in shared_output_names(type(obj)):
+            getattr(obj, name)()
@@ -0,0 +1,170 @@
+"""
+Snapshots of resolved components: the parameter tree of an instance (`get_params()`, recursively, with the class
+paths of all components) stored as JSON lines, which can be loaded later without resolving again.
+
+Every component is written as one line after its subcomponents, so snapshots are written and read as a stream:
+`{"id": 1, "class": "package.module.Class", "params": {...}}`. Subcomponents are referenced by id, which also preserves
+instances that are shared in the tree. The last line is the root component.
+Parameter values are stored as JSON, with markers for tuples, dicts with non-string keys, paths and enums.
+"""
+import enum
+import importlib
+import io
+import json
+import pathlib
+
+from components.component import Component
+from components.spec_cache import class_path
+
+FORMAT = "components-snapshot"
+VERSION = 1
+
+
+def import_class(path):
+    """ Imports a class by its path "package.module.QualName". """
+    parts = path.split('.')
+    for index in range(len(parts) - 1, 0, -1):
+        try:
+            obj = importlib.import_module(".".join(parts[:index]))
+        except ImportError:
+            continue
+        try:
+            for name in parts[index:]:
+                obj = getattr(obj, name)
+        except AttributeError:
+            break
+        return obj
+    raise ImportError(f"Can't import class {path}")
+
+
+class SnapshotWriter(object):
+    """ Writes the parameter trees of components to a text file, one component per line. """
+
+    def __init__(self, file):
+        self.file = file
+        self.ids = dict()
+        self.file.write(json.dumps({'format': FORMAT, 'version': VERSION}) + "\n")
+
+    def write(self, obj):
+        """ Writes `obj` and its subcomponents (which weren't written yet). Returns the id of `obj`. """
+        if id(obj) in self.ids:
+            return self.ids[id(obj)][0]
+        params = {name: self.encode(value, name) for name, value in obj.get_params().items()}
+        node_id = len(self.ids) + 1
+        # keep a reference to obj, so its id isn't reused
+        self.ids[id(obj)] = (node_id, obj)
+        self.file.write(json.dumps({'id': node_id, 'class': class_path(type(obj)), 'params': params},
+                                   separators=(',', ':')) + "\n")
+        return node_id
+
+    def encode(self, value, name):
+        """ JSON compatible representation of a parameter value. """
+        if isinstance(value, Component):
+            return {'__ref__': self.write(value)}
+        if value is None or type(value) in (bool, int, float, str):
+            return value
+        if isinstance(value, enum.Enum):
+            return {'__enum__': class_path(type(value)), 'name': value.name}
+        if isinstance(value, pathlib.PurePath):
+            return {'__path__': str(value)}
+        if type(value) == tuple:
+            return {'__tuple__': [self.encode(v, name) for v in value]}
+        if type(value) == list:
+            return [self.encode(v, name) for v in value]
+        if type(value) == dict:
+            if all(type(k) == str and not k.startswith('__') for k in value):
+                return {k: self.encode(v, name) for k, v in value.items()}
+            return {'__dict__': [[self.encode(k, name), self.encode(v, name)] for k, v in value.items()]}
+        raise TypeError(f"Can't store value of parameter '{name}' of type {type(value)} in a snapshot")
+
+
+class SnapshotReader(object):
+    """ Reads components written by `SnapshotWriter`, constructing them directly with their parameters. """
+
+    def __init__(self, file, classes=None):
+        """ `classes` optionally maps class paths to classes, e.g. for classes that can't be imported. """
+        self.file = file
+        self.classes = dict() if classes is None else dict(classes)
+        self.objects = dict()
+        header = json.loads(file.readline() or "{}")
+        if header.get('format') != FORMAT:
+            raise ValueError("Not a components snapshot")
+        if header.get('version') != VERSION:
+            raise ValueError(f"Unsupported snapshot version {header.get('version')}")
+
+    def get_class(self, path):
+        cls = self.classes.get(path)
+        if cls is None:
+            cls = self.classes[path] = import_class(path)
+        return cls
+
+    def __iter__(self):
+        """ Yields every component in the order they were written (subcomponents first). """
+        for line in self.file:
+            if not line.strip():
+                continue
+            node = json.loads(line)
+            params = {name: self.decode(value) for name, value in node['params'].items()}
+            obj = self.get_class(node['class'])(**params)
+            self.objects[node['id']] = obj
+            yield obj
+
+    def read(self):
+        """ Reads all components and returns the last one, the root. """
+        obj = None
+        for obj in self:
+            pass
+        if obj is None:
+            raise ValueError("Empty snapshot")
+        return obj
+
+    def decode(self, value):
+        if isinstance(value, list):
+            return [self.decode(v) for v in value]
+        if not isinstance(value, dict):
+            return value
+        if '__ref__' in value:
+            return self.objects[value['__ref__']]
+        if '__tuple__' in value:
+            return tuple(self.decode(v) for v in value['__tuple__'])
+        if '__dict__' in value:
+            return {self.decode(k): self.decode(v) for k, v in value['__dict__']}
+        if '__enum__' in value:
+            return self.get_class(value['__enum__'])[value['name']]
+        if '__path__' in value:
+            return pathlib.Path(value['__path__'])
+        return {k: self.decode(v) for k, v in value.items()}
+
+
+def dump(obj, file):
+    """ Writes the snapshot of component `obj` to a text file. """
+    SnapshotWriter(file).write(obj)
+
+
+def dumps(obj):
+    """ Returns the snapshot of component `obj` as string. """
+    file = io.StringIO()
+    dump(obj, file)
+    return file.getvalue()
+
+
+def load(file, classes=None):
+    """ Constructs the component of a snapshot in a text file. """
+    return SnapshotReader(file, classes).read()
+
+
+def loads(snapshot, classes=None):
+    """ Constructs the component of a snapshot string. """
+    return load(io.StringIO(snapshot), classes)
+
+
+def save(obj, path):
+    """ Writes the snapshot of component `obj` to `path`. """
+    with open(path, "w") as f:
+        dump(obj, f)
+
+
+def restore(path, classes=None):
+    """ Constructs the component of the snapshot in `path`. """
+    with open(path) as f:
+        return load(f, classes)
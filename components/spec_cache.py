@@ -0,0 +1,150 @@
+"""
+On-disk cache of the argument specs of CLI commands.
+A spec is stored with the fingerprints (modification time and size) of the source files of the command and of all of
+its (sub)components, so the parser of a command can be rebuilt without importing it while those files are unchanged.
+"""
+import json
+import os
+import pathlib
+import sys
+
+from components.param import ComponentParam
+
+# types that can be stored by name
+BUILTIN_TYPES = {tpe.__name__: tpe for tpe in (int, float, str, bool, pathlib.Path)}
+
+
+def class_path(cls):
+    """ Import path of a class: "module.QualName". """
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def source_files(cls):
+    """ Returns the source files that define the command `cls` and all (sub)component types in its plan. """
+    classes = set()
+
+    def add(c):
+        classes.update(c.__mro__)
+
+    def visit(params):
+        for param in params:
+            if isinstance(param, ComponentParam):
+                add(param.type)
+                visit(param.params)
+
+    add(cls)
+    visit(cls.get_plan())
+
+    files = set()
+    for c in classes:
+        module = sys.modules.get(c.__module__)
+        path = getattr(module, '__file__', None)
+        if path is not None and c.__module__ != 'builtins':
+            files.add(os.path.abspath(path))
+    return sorted(files)
+
+
+def fingerprint(files):
+    """ Returns a dict mapping every file to [mtime_ns, size], or None if a file doesn't exist. """
+    result = dict()
+    for path in files:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        result[path] = [stat.st_mtime_ns, stat.st_size]
+    return result
+
+
+def _is_json_value(value):
+    """ Whether value survives a round trip through JSON unchanged. """
+    try:
+        loaded = json.loads(json.dumps(value))
+    except (TypeError, ValueError):
+        return False
+    return type(loaded) == type(value) and loaded == value
+
+
+def spec_to_json(spec):
+    """ Returns a JSON compatible version of the spec or None if it contains types or defaults that can't be stored. """
+    result = list()
+    for argument in spec:
+        argument = dict(argument)
+        tpe = argument['type']
+        if tpe is not None:
+            if BUILTIN_TYPES.get(getattr(tpe, '__name__', None)) is not tpe:
+                return None
+            argument['type'] = tpe.__name__
+        if 'default' in argument and not _is_json_value(argument['default']):
+            return None
+        result.append(argument)
+    return result
+
+
+def spec_from_json(data):
+    """ Inverse of `spec_to_json`. """
+    spec = list()
+    for argument in data:
+        argument = dict(argument)
+        if argument['type'] is not None:
+            argument['type'] = BUILTIN_TYPES[argument['type']]
+        spec.append(argument)
+    return spec
+
+
+class SpecCache(object):
+    """ JSON file with the argument specs of commands, keyed by command name. """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = None
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = dict()
+        return self._entries
+
+    def get(self, name, path):
+        """
+        Returns the cached entry (a dict with 'spec', 'doc' and 'files') of command `name` defined at import `path`,
+        or None if there is no entry or it is stale.
+        """
+        entry = self.entries.get(name)
+        if entry is None or entry['class'] != path:
+            return None
+        if fingerprint(entry['files']) != entry['files']:
+            return None
+        entry = dict(entry)
+        entry['spec'] = spec_from_json(entry['spec'])
+        return entry
+
+    def put(self, name, cls, spec):
+        """ Stores the spec of command `cls`. Returns whether it could be stored. """
+        data = spec_to_json(spec)
+        if data is None:
+            return False
+        files = fingerprint(source_files(cls))
+        if files is None:
+            return False
+        self.entries[name] = {
+            'class': class_path(cls),
+            'doc': cls.__doc__,
+            'files': files,
+            'spec': data,
+        }
+        self.save()
+        return True
+
+    def save(self):
+        """ Writes the cache atomically. """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,117 @@
+import pickle
+import threading
+
+from components import Component
+from components.artifacts import ArtifactCache, fitted
+
+FITS = []
+
+
+class DataSource(Component):
+    def __init__(self, version: int = 1):
+        self.version = version
+
+    def fingerprint(self):
+        return "data-v1"
+
+    def load_data(self):
+        return [1, 2, 3, 4 * self.version]
+
+
+class Algorithm(Component):
+    def __init__(self, scale: float = 1.):
+        self.scale = scale
+
+    @fitted
+    def fit(self, x):
+        FITS.append(x)
+        self.cutoff_ = self.scale * sum(x) / len(x)
+        return self
+
+
+class Experiment(Component):
+    def __init__(self, algorithm: Algorithm, datasource: DataSource, threshold: float = 0.5):
+        self.algorithm = algorithm
+        self.datasource = datasource
+        self.threshold = threshold
+
+    def run(self):
+        self.algorithm.fit(self.datasource.load_data())
+        return self.algorithm.cutoff_
+
+
+def test_artifact_cache(tmp_path):
+    FITS.clear()
+
+    def run(**params):
+        cache = ArtifactCache(tmp_path, types=[Algorithm], upstream=[DataSource])
+        with cache:
+            experiment = Experiment.resolve(**params)
+        return experiment.run(), cache
+
+    assert run()[0] == 2.5
+    assert len(FITS) == 1
+    # only an evaluation parameter changed: the fitted state is restored
+    cutoff, cache = run(threshold=0.9)
+    assert cutoff == 2.5 and len(FITS) == 1 and cache.restored == 1 and cache.skipped == 1
+    # other configuration of the algorithm or its data
+    assert run(scale=2.)[0] == 5. and len(FITS) == 2
+    assert run(version=2)[0] == 3.5 and len(FITS) == 3
+    assert cache.stored == 0
+
+    # without cache
+    assert Experiment.resolve().run() == 2.5 and len(FITS) == 4
+
+
+def test_storage_limit(tmp_path):
+    cache = ArtifactCache(tmp_path, types=[Algorithm], max_bytes=1)
+    with cache:
+        algorithm = Algorithm.resolve()
+    algorithm.fit([1, 2])
+    assert cache.stored == 1 and cache.storage.size() == 0
+
+
+class Folds(Component):
+    def __init__(self, algorithm: Algorithm, datasource: DataSource):
+        self.algorithm = algorithm
+        self.datasource = datasource
+
+    def run(self):
+        data = self.datasource.load_data()
+        return [(self.algorithm.fit(data[:size]), self.algorithm.cutoff_) for size in (1, 2, 3)]
+
+
+def test_fits_keyed_by_arguments(tmp_path):
+    FITS.clear()
+
+    def run():
+        cache = ArtifactCache(tmp_path, types=[Algorithm], upstream=[DataSource])
+        with cache:
+            folds = Folds.resolve()
+        return folds, folds.run(), cache
+
+    folds, results, cache = run()
+    assert [cutoff for _, cutoff in results] == [1., 1.5, 2.]
+    assert all(result is folds.algorithm for result, _ in results)
+    assert len(FITS) == 3 and cache.stored == 3
+    # the state of the last fit is restored on resolve, every fit restores its own state and return value
+    folds, results, cache = run()
+    assert cache.restored == 1 and cache.skipped == 3 and len(FITS) == 3
+    assert [cutoff for _, cutoff in results] == [1., 1.5, 2.]
+    assert all(result is folds.algorithm for result, _ in results)
+    # the checkpoint isn't pickled
+    assert pickle.loads(pickle.dumps(folds.algorithm)).cutoff_ == 2.
+
+
+def test_threads(tmp_path):
+    cache = ArtifactCache(tmp_path, types=[Algorithm]).install()
+    try:
+        algorithms = []
+        threads = [threading.Thread(target=lambda: algorithms.append(Algorithm.resolve())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        cache.uninstall()
+    assert len(algorithms) == 8 and all('_checkpoint' in vars(algorithm) for algorithm in algorithms)
@@ -0,0 +1,113 @@
+import io
+import json
+from typing import Dict, List
+
+import pytest
+
+from components import Component
+from components.batch import job_argv
+from components.cli import CLI
+
+
+cli = CLI()
+
+
+class Exp(Component, cli.Command):
+    """ Batch test command. """
+    def __init__(self, ratio: float = 0.5, flag: bool = False):
+        self.ratio = ratio
+        self.flag = flag
+
+    def run(self):
+        if self.ratio < 0:
+            raise ValueError("negative ratio")
+        print("ratio", self.ratio)
+        return {'ratio': self.ratio, 'flag': self.flag}
+
+
+class Tags(Component, cli.Command):
+    """ Batch test command with JSON values. """
+    def __init__(self, tags: List[str] = (), weights: Dict[str, float] = None):
+        self.tags = tags
+        self.weights = weights
+
+    def run(self):
+        return {'tags': list(self.tags), 'weights': self.weights}
+
+
+INPUT = """Exp --ratio 0.1
+# comment
+
+{"command": "Exp", "ratio": 0.2, "flag": true}
+Exp --ratio x
+Exp --ratio -1
+--ratio 0.3
+"""
+
+
+def test_job_argv():
+    assert job_argv("Exp --ratio 0.1") == ["Exp", "--ratio", "0.1"]
+    assert job_argv("  # comment") is None
+    assert job_argv('{"command": "Exp", "ratio": 0.2, "flag": false}') == ["Exp", "--ratio", "0.2", "--no-flag"]
+    assert job_argv('{"ratio": 0.2, "a": 1}', default_command="Exp") == ["Exp", "--ratio", "0.2", "-a", "1"]
+    assert job_argv("--ratio 0.3", default_command="Exp", commands=["Exp"]) == ["Exp", "--ratio", "0.3"]
+    assert job_argv("Exp --ratio 0.3", default_command="Exp", commands=["Exp"]) == ["Exp", "--ratio", "0.3"]
+    assert job_argv('{"command": "Tags", "tags": ["a", "b c"]}') == ["Tags", "--tags", '["a", "b c"]']
+    with pytest.raises(ValueError):
+        job_argv('{"command": "Exp", "ratio": ')
+
+
+def test_batch_json_values(tmp_path):
+    input_path = tmp_path / "jobs.txt"
+    input_path.write_text('{"command": "Tags", "tags": ["a", "b,c"], "weights": {"x": 1, "y": 0.5}}\n'
+                          '{"command": "Tags", "tags": \n'
+                          '{"command": "Tags", "tags": ["d"]}\n')
+    output_path = tmp_path / "results.jsonl"
+    with pytest.raises(SystemExit) as e:
+        cli.run(["batch", str(input_path), "-o", str(output_path)])
+    assert e.value.code == 1
+
+    records = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert [r['line'] for r in records] == [1, 2, 3]
+    assert [r['status'] for r in records] == ["ok", "error", "ok"]
+    assert records[0]['result'] == {'tags': ["a", "b,c"], 'weights': {'x': 1.0, 'y': 0.5}}
+    assert records[1]['error'].startswith("invalid line:") and records[1]['argv'] is None
+    assert records[2]['result'] == {'tags': ["d"], 'weights': None}
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_batch(tmp_path, workers):
+    input_path = tmp_path / "jobs.txt"
+    input_path.write_text(INPUT)
+    output_path = tmp_path / "results.jsonl"
+    with pytest.raises(SystemExit) as e:
+        cli.run(["batch", str(input_path), "-o", str(output_path), "-w", str(workers), "-c", "Exp"])
+    assert e.value.code == 1
+
+    records = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert [r['line'] for r in records] == [1, 4, 5, 6, 7]
+    assert [r['status'] for r in records] == ["ok", "ok", "error", "error", "ok"]
+    assert records[0]['result'] == {'ratio': 0.1, 'flag': False} and records[0]['stdout'] == "ratio 0.1\n"
+    assert records[1]['result'] == {'ratio': 0.2, 'flag': True}
+    assert "invalid float value" in records[2]['stderr']
+    assert records[3]['error'] == "ValueError: negative ratio"
+    assert records[4]['result'] == {'ratio': 0.3, 'flag': False}
+
+
+def test_batch_stdin(monkeypatch, capsys):
+    monkeypatch.setattr('sys.stdin', io.StringIO("Exp --ratio 0.4\n"))
+    cli.run(["batch"])
+    record = json.loads(capsys.readouterr().out)
+    assert record['status'] == "ok" and record['command'] == "Exp"
+
+
+def test_batch_exit_code(tmp_path):
+    input_path = tmp_path / "jobs.txt"
+    input_path.write_text("Exp --ratio -1\nExp --ratio -2\n")
+    with pytest.raises(SystemExit) as e:
+        cli.run(["batch", str(input_path), "-o", str(tmp_path / "results.jsonl")])
+    assert e.value.code == 1
+
+    input_path.write_text("Exp --ratio 1\n")
+    # succeeds without exiting
+    cli.run(["batch", str(input_path), "-o", str(tmp_path / "results.jsonl")])
@@ -1,7 +1,16 @@
+import enum
+import io
+import json
+import shutil
+import subprocess
+import sys
+import typing
+
 import pytest
 
-from components import Component
+from components import Component, benchmark
 from components.cli import CLI
+from components.spec_cache import SpecCache
 
 
 @pytest.fixture()
@@ -99,3 +108,275 @@ def test_list_param(cli):
 def test_multiple_commands(cli):
     assert False
 
+
+
+def test_lazy_command_setup(cli):
+    class Comp1(Component, cli.Command):
+        def __init__(self, par: int = 3):
+            self.par = par
+
+        def run(self):
+            pass
+
+    class Comp2(Component, cli.Command):
+        def __init__(self, other: str = "a"):
+            self.other = other
+
+        def run(self):
+            pass
+
+    cls, kwargs = cli.parse_args(["Comp1", "--par", "4"])
+    assert cls == Comp1 and kwargs == {'par': 4}
+    assert cli.configured_commands == {"Comp1"}
+    assert set(cli.subparsers.choices) == {"Comp1", "Comp2", "batch"}
+
+    cls, kwargs = cli.parse_args(["Comp2"])
+    assert cls == Comp2 and kwargs == {'other': "a"}
+    assert cli.configured_commands == {"Comp1", "Comp2"}
+
+
+def test_lazy_command_setup_help(cli, capsys):
+    class Comp1(Component, cli.Command):
+        """ First command. """
+        def __init__(self, par: int = 3):
+            self.par = par
+
+        def run(self):
+            pass
+
+    with pytest.raises(SystemExit):
+        cli.parse_args(["-h"])
+    assert "First command." in capsys.readouterr().out
+    assert cli.configured_commands == set()
+
+    with pytest.raises(SystemExit):
+        cli.parse_args(["Comp1", "-h"])
+    assert "--par" in capsys.readouterr().out
+
+
+LAZY_MODULE = '''
+from components import Component, benchmark
+
+
+class Heavy(Component):
+    """ Heavy command. """
+    def __init__(self, par: int = 1):
+        self.par = par
+
+    def run(self):
+        print("par:", self.par)
+'''
+
+
+@pytest.fixture()
+def lazy_module(tmp_path, monkeypatch):
+    (tmp_path / "lazy_commands_mod.py").write_text(LAZY_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "lazy_commands_mod"
+    sys.modules.pop("lazy_commands_mod", None)
+
+
+def test_lazy_registration(cli, lazy_module, capsys):
+    class Comp(Component, cli.Command):
+        def run(self):
+            print("comp")
+
+    cli.add_command("lazy_commands_mod.Heavy", help="A heavy command.")
+    cli.add_command("lazy_commands_mod:Heavy", name="Other")
+
+    with pytest.raises(SystemExit):
+        cli.run(["-h"])
+    out = capsys.readouterr().out
+    assert "Heavy" in out and "A heavy command." in out and "Other" in out
+
+    cli.run(["Comp"])
+    assert capsys.readouterr().out == "comp\n"
+    assert lazy_module not in sys.modules
+
+    cli.run(["Heavy", "--par", "4"])
+    assert capsys.readouterr().out == "par: 4\n"
+    assert lazy_module in sys.modules
+    assert cli.get_command("Other") is cli.get_command("Heavy")
+
+
+def test_lazy_registration_not_component(cli):
+    cli.add_command("collections.OrderedDict")
+    with pytest.raises(TypeError):
+        cli.run(["OrderedDict"])
+
+
+def test_spec_cache(lazy_module, tmp_path, capsys):
+    cache_path = str(tmp_path / "cache" / "specs.json")
+    cli = CLI(spec_cache=cache_path)
+    cli.add_command("lazy_commands_mod.Heavy")
+    cli.run(["Heavy", "--par", "2"])
+    assert capsys.readouterr().out == "par: 2\n"
+
+    # a new process: parser and help are built from the cache
+    sys.modules.pop(lazy_module)
+    cli = CLI(spec_cache=cache_path)
+    cli.add_command("lazy_commands_mod.Heavy")
+    with pytest.raises(SystemExit):
+        cli.run(["Heavy", "-h"])
+    out = capsys.readouterr().out
+    assert "--par int" in out and "(default: 1)" in out and "Heavy command." in out
+    assert lazy_module not in sys.modules
+    with pytest.raises(SystemExit):
+        cli.run(["Heavy", "--par", "x"])
+    assert lazy_module not in sys.modules
+
+    # stale cache falls back to the module
+    sys.modules.pop(lazy_module, None)
+    module_file = tmp_path / "lazy_commands_mod.py"
+    module_file.write_text(LAZY_MODULE.replace("par: int = 1", "par: int = 12"))
+    cli = CLI(spec_cache=cache_path)
+    cli.add_command("lazy_commands_mod.Heavy")
+    with pytest.raises(SystemExit):
+        cli.run(["Heavy", "-h"])
+    assert "(default: 12)" in capsys.readouterr().out
+    assert lazy_module in sys.modules
+
+
+def test_spec_cache_unsupported_types(cli, tmp_path):
+    class Comp(Component, cli.Command):
+        def __init__(self, values: list = (1, 2)):
+            self.values = values
+
+        def run(self):
+            pass
+
+    cli.spec_cache = SpecCache(str(tmp_path / "specs.json"))
+    cli.parse_args(["Comp"])
+    assert cli.spec_cache.entries == {}
+
+
+def test_completion_script(cli, tmp_path, capsys):
+    class Comp(Component, cli.Command):
+        """ Main command. """
+        def __init__(self, out_path: str = "out", flag: bool = False, count: int = 1):
+            self.out_path = out_path
+            self.flag = flag
+            self.count = count
+
+        def run(self):
+            pass
+
+    script = cli.completion_script("bash", prog="app")
+    assert "complete -o default -F _app_complete app" in script
+    assert "--flag --no-flag" in script
+    assert '--out-path) COMPREPLY=( $(compgen -f -- "$cur") ); return;;' in script
+    assert "--count) COMPREPLY=(); return;;" in script
+
+    script = cli.completion_script("zsh", prog="app")
+    assert "'Comp:Main command.'" in script
+    assert "'--out-path:path:_files'" in script and "'--no-flag'" in script and "'--count:int: '" in script
+
+    with pytest.raises(SystemExit):
+        cli.run(["--completion", "bash"])
+    assert "_complete" in capsys.readouterr().out
+
+    assert script.startswith("#compdef app\n# zsh completion for app")
+    assert "|--warmup|--repeat|" in script and "--benchmark|" not in script
+
+    path = str(tmp_path / "app.bash")
+    assert cli.write_completion(path, prog="app")
+    assert not cli.write_completion(path, prog="app")
+    path = str(tmp_path / "_app")
+    assert cli.write_completion(path, shell="zsh", prog="app")
+    assert not cli.write_completion(path, shell="zsh", prog="app")
+    with open(path, "w") as f:
+        f.write(script.replace("Spec hash: ", "Spec hash: 0"))
+    assert cli.write_completion(path, shell="zsh", prog="app")
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="requires bash")
+def test_bash_completion_after_global_options(cli, tmp_path):
+    class Comp(Component, cli.Command):
+        def __init__(self, count: int = 1):
+            self.count = count
+
+        def run(self):
+            pass
+
+    path = tmp_path / "app.bash"
+    path.write_text(cli.completion_script("bash", prog="app"))
+
+    def complete(*words):
+        script = (f"source {path}; COMP_WORDS=(app {' '.join(words)}); COMP_CWORD={len(words)}; "
+                  "_app_complete; echo \"${COMPREPLY[*]}\"")
+        return subprocess.run(["bash", "-c", script], stdout=subprocess.PIPE, check=True).stdout.decode().split()
+
+    assert "--count" in complete("--warmup", "3", "Comp", "--")
+    assert "--count" in complete("--benchmark", "--repeat", "2", "Comp", "--")
+    assert complete("--warmup", "") == []
+    assert "Comp" in complete("--warmup", "3", "")
+
+
+def test_benchmark(cli, tmp_path, capsys):
+    class Comp(Component, cli.Command):
+        resolves = 0
+        runs = 0
+
+        def __init__(self, repeat: int = 3):
+            Comp.resolves += 1
+            self.repeat = repeat
+
+        def run(self):
+            Comp.runs += 1
+
+    cls, kwargs, options = cli.parse(["--benchmark", "--repeat", "4", "Comp", "--repeat", "7"])
+    assert kwargs == {'repeat': 7}
+    assert options['benchmark'] and options['repeat'] == 4 and options['warmup'] == 1 and not options['reuse']
+
+    output = str(tmp_path / "stats.json")
+    cli.run(["--benchmark", "--warmup", "2", "--repeat", "4", "--benchmark-output", output, "Comp"])
+    assert Comp.resolves == 6 and Comp.runs == 6
+    with open(output) as f:
+        stats = json.load(f)
+    assert stats['command'] == "Comp"
+    assert stats['resolve']['count'] == 4 and stats['run']['count'] == 4
+    assert stats['resolve']['min'] <= stats['resolve']['median'] <= stats['resolve']['p95']
+    assert "resolve" in capsys.readouterr().err
+
+    Comp.resolves = Comp.runs = 0
+    cli.run(["--benchmark", "--reuse", "--repeat", "3", "Comp"])
+    assert Comp.resolves == 1 and Comp.runs == 4
+    capsys.readouterr()
+
+    with pytest.raises(SystemExit):
+        cli.parse(["--benchmark", "--repeat", "0", "Comp"])
+    assert "must be at least 1" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        cli.parse(["--benchmark", "--warmup", "-1", "Comp"])
+
+    # without measured repetitions (e.g. called directly), the report doesn't fail
+    stats = benchmark.benchmark(Comp, {}, warmup=1, repeat=0)
+    assert stats['run'] == {'count': 0}
+    out = io.StringIO()
+    benchmark.report(stats, file=out)
+    assert "not measured" in out.getvalue()
+
+
+def test_coerced_arguments(cli, tmp_path):
+    class Color(enum.Enum):
+        RED = "red"
+        BLUE = "blue"
+
+    class Comp(Component, cli.Command):
+        def __init__(self, values: typing.List[int] = None, pair: typing.Tuple[str, float] = ("a", 1.),
+                     color: Color = Color.RED, limit: typing.Optional[int] = None):
+            self.values = values
+
+        def run(self):
+            pass
+
+    values_file = tmp_path / "values.txt"
+    values_file.write_text("1\n2\n3\n")
+    cls, kwargs = cli.parse_args(["Comp", "--values", "4,5", "--pair", "b,2", "--color", "BLUE", "--limit", "3"])
+    assert kwargs == {'values': [4, 5], 'pair': ("b", 2.), 'color': Color.BLUE, 'limit': 3}
+    cls, kwargs = cli.parse_args(["Comp", "--values", f"@{values_file}", "--limit", "none"])
+    assert kwargs['values'] == [1, 2, 3] and kwargs['limit'] is None
+    with pytest.raises(SystemExit):
+        cli.parse_args(["Comp", "--values", "a,b"])
+    with pytest.raises(SystemExit):
+        cli.parse_args(["Comp", "--values", f"@{tmp_path / 'missing.txt'}"])
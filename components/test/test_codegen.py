@@ -0,0 +1,61 @@
+import pathlib
+from typing import Tuple
+
+import pytest
+
+from components import Component
+from components.codegen import compile_factory, generate, load_factory
+
+
+class Leaf(Component):
+    def __init__(self, key: int = 1, path: pathlib.Path = pathlib.Path("data"), names: tuple = ("a", "b")):
+        self.key = key
+        self.path = path
+        self.names = names
+
+
+class Root(Component):
+    def __init__(self, leaf: Leaf, items: Tuple[Leaf, Leaf], rate: float = 0.5, _verbose=False):
+        self.leaf = leaf
+        self.items = items
+        self.rate = rate
+
+
+def test_generate():
+    source, injected = generate(Root, rate=2.)
+    assert "import test_codegen as _module_0" in source and "rate=2.0" in source
+    # the Path default is injected
+    assert len(injected) == 1 and injected[0] == pathlib.Path("data")
+    compile(source, "factory", "exec")
+
+
+def test_factory_identical_to_resolve():
+    factory = compile_factory(Root, leaf_key=3, items_1_key=4)
+    obj, expected = factory(), Root.resolve(leaf_key=3, items_1_key=4)
+    assert type(obj) == Root and obj is not factory()
+    assert obj.full_identifier == expected.full_identifier
+    assert obj.get_params()['rate'] == 0.5
+    assert obj.leaf.get_params() == expected.leaf.get_params()
+    assert [item.key for item in obj.items] == [1, 4] and obj.leaf.key == 3
+
+
+def test_local_classes_are_injected():
+    class Local(Component):
+        def __init__(self, value: int = 5):
+            self.value = value
+
+    factory = compile_factory(Local)
+    assert Local in factory.injected
+    assert factory().get_params() == {'value': 5}
+
+
+def test_factory_cache(tmp_path):
+    factory = compile_factory(Root, cache_dir=str(tmp_path), rate=1.)
+    files = list(tmp_path.glob("factory_*.py"))
+    assert len(files) == 1
+    assert factory().rate == 1.
+
+    loaded = load_factory(str(files[0]), factory.injected)
+    assert loaded.source == factory.source and loaded().full_identifier == factory().full_identifier
+    with pytest.raises(TypeError):
+        load_factory(str(files[0]))
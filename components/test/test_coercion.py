@@ -0,0 +1,92 @@
+import enum
+import typing
+
+import pytest
+
+from components import Component
+from components.coercion import compile_converter, runtime_type
+
+
+class Mode(enum.Enum):
+    FAST = 1
+    SLOW = 2
+
+
+def test_compile_converter():
+    assert compile_converter(int)("3") == 3
+    assert compile_converter(float)(3) == 3.
+    assert compile_converter(bool)("no") is False
+    assert compile_converter(Mode)("FAST") == Mode.FAST
+    assert compile_converter(Mode)("2") == Mode.SLOW
+    assert compile_converter(typing.List[float])("1, 2.5") == [1., 2.5]
+    assert compile_converter(typing.List[int])("[1, 2]") == [1, 2]
+    assert compile_converter(typing.Set[int])(["1", "1"]) == {1}
+    assert compile_converter(typing.Tuple[int, ...])("1,2") == (1, 2)
+    assert compile_converter(typing.Dict[str, int])('{"a": "1"}') == {'a': 1}
+    assert compile_converter(typing.List[typing.List[int]])("[[1], [2, 3]]") == [[1], [2, 3]]
+    assert compile_converter(typing.Optional[int])("null") is None
+    assert compile_converter(int, optional=True)("none") is None
+    assert compile_converter(str, optional=True)("none") == "none"
+    assert compile_converter(Component) is None
+    assert compile_converter(typing.List[int]).__name__ == "List[int]"
+    with pytest.raises(ValueError):
+        compile_converter(typing.Tuple[int, int])("1,2,3")
+
+
+def test_resolve_coerce(tmp_path):
+    class SubComp(Component):
+        def __init__(self, weights: typing.List[float] = (), mode: Mode = Mode.FAST):
+            self.weights = weights
+            self.mode = mode
+
+    class Comp(Component):
+        def __init__(self, sub: SubComp, size: int = 1, pair: typing.Tuple[int, int] = (0, 0)):
+            self.sub = sub
+            self.size = size
+            self.pair = pair
+
+    weights_file = tmp_path / "weights.json"
+    weights_file.write_text("[0.5, 1.5]")
+    c = Comp.resolve_coerced(size="4", weights=f"@{weights_file}", mode="SLOW", pair="1,2")
+    assert c.size == 4 and c.pair == (1, 2)
+    assert c.sub.weights == [0.5, 1.5] and c.sub.mode == Mode.SLOW
+    assert Comp.resolve_coerced(weights=[1, "2"]).sub.weights == [1., 2.]
+    assert repr(c) == "Comp(sub=SubComp(...), size=4, pair=(1, 2))"
+    with pytest.raises(TypeError):
+        Comp.resolve_coerced(size="large")
+    with pytest.raises(TypeError, match="Can't read"):
+        Comp.resolve_coerced(weights=f"@{tmp_path / 'missing.json'}")
+
+
+def test_coerce_param_named_coerce():
+    class Comp(Component):
+        def __init__(self, coerce: bool = False, size: int = 1):
+            self.coerce = coerce
+            self.size = size
+
+    assert Comp.resolve(coerce=True).coerce is True
+    c = Comp.resolve_coerced(coerce="yes", size="2")
+    assert c.coerce is True and c.size == 2
+    assert Comp.validate(coerce=True).valid and Comp.validate_coerced(coerce="no").valid
+
+
+def test_missing_file():
+    for tpe in (typing.List[int], typing.Dict[str, int]):
+        with pytest.raises(ValueError, match="Can't read '/nonexistent/values.txt'"):
+            compile_converter(tpe)("@/nonexistent/values.txt")
+
+
+def test_generic_parameters():
+    assert runtime_type(typing.List[int]) is list and runtime_type(typing.Dict[str, int]) is dict
+    assert runtime_type(typing.List) is list and runtime_type(Mode) is Mode
+    assert runtime_type(typing.Union[int, str]) is None
+
+    class Comp(Component):
+        def __init__(self, values: typing.List[int] = (), mapping: typing.Dict[str, int] = None):
+            self.values = values
+            self.mapping = mapping
+
+    c = Comp.resolve(values=[1, 2], mapping={'a': 1})
+    assert c.values == [1, 2] and c.mapping == {'a': 1}
+    with pytest.warns(RuntimeWarning):
+        Comp.resolve(values={1: 2})
@@ -1,6 +1,7 @@
 import pytest
 
 from components import Component
+from components.component import InstanceCache
 
 
 def test_resolve_component():
@@ -870,3 +871,114 @@ def test_annotations_forward_ref_attribute():
 
     c = Comp.resolve()
     assert type(c.sub) == OtherComp
+
+
+def test_plan_cached():
+    class SubComp(Component):
+        def __init__(self, key=5):
+            self.key = key
+
+    class Comp(Component):
+        def __init__(self, sub: SubComp):
+            self.sub = sub
+
+    assert Comp.get_plan() is Comp.get_plan()
+    assert Comp.resolve(key=3).sub.key == 3
+
+    plan = Comp.get_plan()
+    Comp.key = 8
+    assert Comp.resolve().sub.key == 8
+    assert Comp.get_plan() is not plan
+    del Comp.key
+    assert Comp.resolve().sub.key == 5
+    SubComp.key = 7
+    assert Comp.resolve().sub.key == 7
+
+
+PROVIDED = {'key': 1}
+
+
+def test_plan_not_cached_with_provider_hooks():
+    class SubComp(Component):
+        def __init__(self, key=5):
+            self.key = key
+
+        @classmethod
+        def get_provided_parameters(cls):
+            return dict(PROVIDED)
+
+    class Comp(Component):
+        def __init__(self, sub: SubComp):
+            self.sub = sub
+
+    assert Comp.resolve().sub.key == 1
+    PROVIDED['key'] = 2
+    assert Comp.resolve().sub.key == 2
+    PROVIDED['key'] = 1
+
+
+def test_plan_cache_doesnt_keep_classes_alive():
+    import gc
+    import weakref
+
+    def create():
+        class SubComp(Component):
+            def __init__(self, key: int = 5):
+                super().__init__()
+                self.key = key
+
+        class Comp(Component):
+            def __init__(self, sub: SubComp):
+                super().__init__()
+                self.sub = sub
+
+        Comp.resolve_coerced(key="3")
+        return weakref.ref(Comp), weakref.ref(SubComp)
+
+    refs = create()
+    # the converter cache entry is removed when the component class is collected, its subcomponents in the next pass
+    gc.collect()
+    gc.collect()
+    assert [ref() for ref in refs] == [None, None]
+
+
+def test_plan_cache_monkeypatch(monkeypatch):
+    class Comp(Component):
+        def __init__(self, key=5):
+            self.key = key
+
+    assert Comp.resolve().key == 5
+    monkeypatch.setattr(Comp, 'key', 8, raising=False)
+    assert Comp.resolve().key == 8
+    monkeypatch.undo()
+    assert Comp.resolve().key == 5
+
+
+def test_instance_cache():
+    class SubComp(Component):
+        def __init__(self, key=5):
+            self.key = key
+
+    class Comp(Component):
+        def __init__(self, sub: SubComp, par=1):
+            self.sub = sub
+            self.par = par
+
+    with InstanceCache([SubComp]) as cache:
+        c1 = Comp.resolve(par=2)
+        c2 = Comp.resolve(par=3)
+        c3 = Comp.resolve(key=4)
+    assert c1 is not c2 and c1.sub is c2.sub
+    assert c3.sub is not c1.sub
+    assert len(cache.instances) == 2
+    assert InstanceCache.active() is None
+    assert Comp.resolve().sub is not c1.sub
+
+    with InstanceCache([SubComp], max_size=2) as cache:
+        c1 = Comp.resolve(key=1)
+        Comp.resolve(key=2)
+        assert Comp.resolve(key=1).sub is c1.sub
+        Comp.resolve(key=3)
+        assert Comp.resolve(key=1).sub is c1.sub
+        assert len(cache.instances) == 2
+        assert [key[1] for key in cache.instances] == [(('key', '3'),), (('key', '1'),)]
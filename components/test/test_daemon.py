@@ -0,0 +1,79 @@
+import io
+import os
+import threading
+
+import pytest
+
+from components import Component
+from components.cli import CLI
+from components.daemon import Daemon, request
+
+
+class Source(Component):
+    instances = 0
+
+    def __init__(self, path: str = "data.txt"):
+        Source.instances += 1
+        self.path = path
+
+
+@pytest.fixture()
+def cli():
+    return CLI()
+
+
+@pytest.fixture()
+def daemon(cli, tmp_path):
+    class Comp(Component, cli.Command):
+        def __init__(self, source: Source, par: int = 3):
+            self.source = source
+            self.par = par
+
+        def run(self):
+            print("par:", self.par, "path:", self.source.path)
+            if self.par < 0:
+                raise ValueError("negative")
+
+    d = Daemon(cli, str(tmp_path / "cli.sock"), shared=(Source,))
+    thread = threading.Thread(target=d.serve_forever)
+    thread.start()
+    yield d
+    d.shutdown()
+    thread.join()
+    d.server_close()
+
+
+def test_daemon_runs_command(daemon):
+    out = io.StringIO()
+    assert request(daemon.socket_path, ["Comp", "--par", "5"], stdout=out) == 0
+    assert out.getvalue() == "par: 5 path: data.txt\n"
+
+
+def test_daemon_exit_codes(daemon):
+    out, err = io.StringIO(), io.StringIO()
+    assert request(daemon.socket_path, ["Comp", "--par", "x"], stdout=out, stderr=err) == 2
+    assert "invalid int value" in err.getvalue()
+
+    assert request(daemon.socket_path, ["Comp", "-h"], stdout=out, stderr=err) == 0
+    assert "--par" in out.getvalue()
+
+    err = io.StringIO()
+    assert request(daemon.socket_path, ["Comp", "--par", "-1"], stdout=out, stderr=err) == 1
+    assert "ValueError: negative" in err.getvalue()
+
+
+def test_daemon_shares_components(daemon):
+    Source.instances = 0
+    out = io.StringIO()
+    for par in range(3):
+        assert request(daemon.socket_path, ["Comp", "--par", str(par)], stdout=out) == 0
+    assert Source.instances == 1
+    assert request(daemon.socket_path, ["Comp", "--path", "other.txt"], stdout=out) == 0
+    assert Source.instances == 2
+
+
+def test_daemon_socket_removed(cli, tmp_path):
+    path = str(tmp_path / "cli.sock")
+    with Daemon(cli, path):
+        assert os.path.exists(path)
+    assert not os.path.exists(path)
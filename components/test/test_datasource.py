@@ -0,0 +1,46 @@
+import mmap
+import pickle
+
+import pytest
+
+from components.datasource import MemoryMappedSource
+
+
+class Source(MemoryMappedSource):
+    def load_data(self):
+        return list(self.data)
+
+
+@pytest.fixture()
+def path(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(range(256)) * 40)
+    return str(path)
+
+
+def test_slicing(path):
+    source = Source.resolve(path=path, offset=mmap.ALLOCATIONGRANULARITY + 3, length=10)
+    assert len(source) == 10
+    assert bytes(source[:3]) == bytes([3, 4, 5])
+    assert isinstance(source[2:5], memoryview)
+    assert source.load_data() == list(range(3, 13))
+    source.close()
+
+    assert len(Source(path=path, offset=10 ** 6)) == 0
+
+
+def test_chunks(path):
+    source = Source(path=path, sequential=True)
+    chunks = list(source.chunks(4096))
+    assert [len(chunk) for chunk in chunks] == [4096, 4096, 2048]
+    assert b"".join(chunks) == bytes(range(256)) * 40
+    source.close()
+
+
+def test_pickle(path):
+    source = Source(path=path, offset=5)
+    source.open()
+    data = pickle.dumps(source)
+    assert len(data) < 300
+    copy = pickle.loads(data)
+    assert copy._view is None and bytes(copy[:2]) == bytes([5, 6])
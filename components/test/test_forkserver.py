@@ -0,0 +1,63 @@
+import gc
+import os
+
+import pytest
+
+from components import Component
+from components.forkserver import ForkServer
+
+
+class Source(Component):
+    def __init__(self, path: str = "data.txt"):
+        self.path = path
+        self.pid = os.getpid()
+
+
+class Exp(Component):
+    def __init__(self, source: Source, ratio: float = 0.8):
+        self.source = source
+        self.ratio = ratio
+
+    def run(self):
+        if self.ratio < 0:
+            raise ValueError("negative ratio")
+        return self.source.pid, self.source.path, self.ratio, os.getpid()
+
+
+def test_shared_resolved_in_parent():
+    with ForkServer(Exp, [Source], processes=2) as server:
+        results = server.map([{'ratio': 0.1}, {'ratio': 0.2}, {'ratio': 0.3}])
+
+    assert [r[2] for r in results] == [0.1, 0.2, 0.3]
+    for source_pid, path, ratio, pid in results:
+        assert source_pid == os.getpid()
+        assert pid != os.getpid()
+
+
+def test_common_params():
+    with ForkServer(Exp, [Source], path="other.txt") as server:
+        assert len(server.instance_cache.instances) == 1
+        source_pid, path, ratio, pid = server.submit({'ratio': 0.5}).get()
+        assert source_pid == os.getpid() and path == "other.txt"
+
+        # different configuration of shared component is resolved in the child
+        source_pid, path, ratio, pid = server.submit({'path': "third.txt"}).get()
+        assert source_pid == pid and path == "third.txt"
+
+
+def test_error_in_job():
+    with ForkServer(Exp, [Source]) as server:
+        with pytest.raises(ValueError):
+            server.submit({'ratio': -1.0}).get()
+
+
+def test_multiple_servers():
+    with ForkServer(Exp, [Source], path="one.txt") as one, ForkServer(Exp, [Source], path="two.txt") as two:
+        assert one.submit({}).get()[1] == "one.txt"
+        assert two.submit({}).get()[1] == "two.txt"
+        if hasattr(gc, 'freeze'):
+            one.close()
+            # the heap stays frozen while the other server is active
+            assert gc.get_freeze_count() > 0
+    if hasattr(gc, 'freeze'):
+        assert gc.get_freeze_count() == 0
@@ -0,0 +1,88 @@
+import json
+import threading
+import time
+import tracemalloc
+
+from components import Component
+from components.memory import MemoryProfiler, memory_resolve
+
+
+class Big(Component):
+    def __init__(self, size: int = 1000000):
+        self.data = bytearray(size)
+
+
+class Small(Component):
+    def __init__(self, key: int = 1):
+        self.key = key
+
+
+class Root(Component):
+    def __init__(self, big: Big, small: Small):
+        self.big = big
+        self.small = small
+
+
+class Sleepy(Component):
+    def __init__(self, delay: float = 0.01):
+        time.sleep(delay)
+        self.delay = delay
+
+
+class Threaded(Component):
+    def __init__(self, sleepy: Sleepy, big: Big):
+        self.sleepy = sleepy
+        self.big = big
+
+
+def test_memory_tree():
+    obj, tree = memory_resolve(Root, top_sites=3)
+    assert not tracemalloc.is_tracing()
+    big, small = tree.children
+    assert big.path == ('big',) and small.path == ('small',)
+    assert big.own_bytes >= 1000000 and big.total_bytes >= 1000000
+    assert small.own_bytes < 10000
+    assert tree.total_bytes >= big.total_bytes
+    assert tree.own_bytes < 10000
+    assert big.sites[0][0].endswith("test_memory.py:12") and big.sites[0][1] >= 1000000
+    assert "big (Big)" in str(tree)
+
+
+def test_memory_largest_and_export():
+    with MemoryProfiler() as profiler:
+        Root.resolve(size=500000)
+    assert profiler.largest(1)[0].cls == Big
+    assert profiler.tree.children[0].sites == []
+
+    data = json.loads(profiler.to_json())
+    assert data[0]['children'][0]['path'] == "big"
+    assert data[0]['children'][0]['own_bytes'] >= 500000
+
+
+def test_memory_keeps_tracing():
+    tracemalloc.start()
+    try:
+        with MemoryProfiler():
+            Root.resolve(size=10)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_memory_threads():
+    profiler = MemoryProfiler()
+    profiler.install()
+    try:
+        assert tracemalloc.is_tracing()
+        threads = [threading.Thread(target=Threaded.resolve, kwargs={'size': 10}) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        profiler.uninstall()
+    assert not tracemalloc.is_tracing()
+    assert len(profiler.trees) == 4
+    for tree in profiler.trees:
+        assert tree.cls == Threaded
+        assert [(child.path, child.cls) for child in tree.children] == [(('sleepy',), Sleepy), (('big',), Big)]
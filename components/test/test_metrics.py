@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from components import Component
+from components.component import InstanceCache
+from components.metrics import Counter, Histogram, MetricsRegistry, ResolveMetrics
+
+
+class Sub(Component):
+    def __init__(self, key: int = 5):
+        self.key = key
+
+
+class Comp(Component):
+    def __init__(self, sub: Sub):
+        self.sub = sub
+
+
+def test_counter_threads():
+    counter = Counter("test_total", "Test counter.", ["kind"])
+
+    def work():
+        for _ in range(1000):
+            counter.inc("a")
+        counter.inc("b", value=2)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.get("a") == 8000 and counter.get("b") == 16
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_histogram_prometheus():
+    histogram = Histogram("latency_seconds", "Latency.", ["op"], buckets=[0.1, 1.])
+    histogram.observe(0.05, "x")
+    histogram.observe(0.5, "x")
+    histogram.observe(5., "x")
+    text = histogram.to_prometheus()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{op="x",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{op="x",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{op="x",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{op="x"} 3' in text
+
+
+def test_registry():
+    registry = MetricsRegistry()
+    assert registry.counter("a_total") is registry.counter("a_total")
+    with pytest.raises(ValueError):
+        registry.histogram("a_total")
+
+
+def test_resolve_metrics(tmp_path):
+    metrics = ResolveMetrics()
+    with metrics:
+        Comp.resolve()
+        Comp.resolve(key=3)
+        with pytest.warns(RuntimeWarning):
+            Comp.resolve(key="x")
+        with InstanceCache([Sub]):
+            Comp.resolve()
+            Comp.resolve()
+    Comp.resolve()
+
+    name = f"{Comp.__module__}.{Comp.__qualname__}"
+    sub_name = f"{Sub.__module__}.{Sub.__qualname__}"
+    assert metrics.resolves.get(name) == 5
+    assert metrics.plan_cache.get(name, "hit") + metrics.plan_cache.get(name, "miss") == 5
+    assert metrics.components.get(sub_name) == 5
+    assert metrics.instance_cache.get(sub_name, "miss") == 1 and metrics.instance_cache.get(sub_name, "hit") == 1
+    assert metrics.warnings.get(sub_name) == 1
+    assert metrics.latency.values()[(name,)][2] == 5
+
+    path = str(tmp_path / "metrics.prom")
+    metrics.registry.write(path)
+    with open(path) as f:
+        text = f.read()
+    assert f'components_resolves_total{{component="{name}"}} 5' in text
+
+
+def test_resolve_metrics_install():
+    metrics = ResolveMetrics().install()
+    try:
+        thread = threading.Thread(target=Comp.resolve)
+        thread.start()
+        thread.join()
+        Comp.resolve()
+    finally:
+        metrics.uninstall()
+    Comp.resolve()
+    assert sum(metrics.resolves.values().values()) == 2
@@ -0,0 +1,65 @@
+import pickle
+
+import pytest
+
+from components import Component
+from components.pickling import ParamPickling, PickleBuffer, dumps, loads
+
+
+class Sub(Component):
+    def __init__(self, size: int = 2):
+        self.size = size
+        self.cache = list(range(size))
+
+
+class Model(Component, ParamPickling):
+    constructed = 0
+
+    def __init__(self, sub: Sub, rate: float = 0.1):
+        self.sub = sub
+        self.rate = rate
+        self.fitted = None
+        self.weights = bytearray(4)
+        Model.constructed += 1
+
+    def get_shared_state(self):
+        return {'weights': self.weights}
+
+
+def test_pickle_params_only():
+    model = Model.resolve(rate=0.5, size=3)
+    model.fitted = object()
+    before = Model.constructed
+    copy = pickle.loads(pickle.dumps(model))
+    assert Model.constructed == before + 1
+    assert copy.get_params()['rate'] == 0.5 and copy.fitted is None
+    # subcomponents without ParamPickling are pickled as usual
+    assert copy.sub.size == 3 and copy.sub.cache == [0, 1, 2]
+
+
+class Provided(Model):
+    rate = 0.7
+
+
+def test_rebuilt_through_plan():
+    model = Provided.resolve()
+    assert model.rate == 0.7
+    # the parameters are passed explicitly, types are validated
+    model.get_params()['rate'] = "high"
+    with pytest.warns(RuntimeWarning):
+        assert pickle.loads(pickle.dumps(model)).rate == "high"
+
+
+@pytest.mark.skipif(PickleBuffer is None, reason="out-of-band buffers require Python 3.8")
+def test_out_of_band_shared_state():
+    model = Model.resolve()
+    model.weights[:] = b"\x01\x02\x03\x04"
+    data, buffers = dumps(model)
+    assert len(buffers) == 1 and bytes(buffers[0]) == b"\x01\x02\x03\x04"
+    assert b"\x01\x02\x03\x04" not in data
+    copy = loads(data, buffers)
+    assert type(copy.weights) == bytearray and copy.weights == model.weights
+
+    # in-band
+    copy = pickle.loads(pickle.dumps(model, protocol=5))
+    assert type(copy.weights) == bytearray and copy.weights == model.weights
@@ -0,0 +1,173 @@
+import threading
+import time
+from typing import Tuple
+
+import pytest
+
+from components.pipeline import Pipeline, Stage
+
+
+class Split(Stage):
+    def __init__(self, lowercase: bool = False):
+        self.lowercase = lowercase
+
+    def process(self, lines):
+        for line in lines:
+            yield from (line.lower() if self.lowercase else line).split()
+
+
+class Length(Stage):
+    def process_item(self, word):
+        return len(word)
+
+
+class Fail(Stage):
+    def __init__(self, at: int = 3):
+        self.at = at
+
+    def process_item(self, item):
+        if item == self.at:
+            raise ValueError("failed")
+        return item
+
+
+class TextPipeline(Pipeline):
+    stages: Tuple[Split, Length]
+
+
+LINES = ["A b", "cc DDD", "", "eeee"]
+
+
+def test_pipeline():
+    pipeline = TextPipeline.resolve(batch_size=2)
+    assert pipeline.run(LINES) == [1, 1, 2, 3, 4]
+    split, length = pipeline.stats
+    assert (split.items_in, split.items_out, split.batches_in) == (4, 5, 2)
+    assert (length.items_in, length.items_out, length.batches_out) == (5, 5, 3)
+    assert split.busy_time > 0 and length.throughput > 0
+
+
+def test_stage_params_addressable():
+    pipeline = TextPipeline.resolve(stages_0_lowercase=True)
+    assert pipeline.stages[0].lowercase
+    assert TextPipeline.resolve(lowercase=True).stages[0].lowercase
+
+
+def test_queues():
+    pipeline = TextPipeline.resolve(batch_size=1, queue_size=1)
+    assert pipeline.run(LINES * 50) == [1, 1, 2, 3, 4] * 50
+    assert pipeline.stats[1].items_out == 250
+    assert threading.active_count() == 1
+
+
+def test_errors_and_early_stop():
+    class FailingPipeline(Pipeline):
+        stages: Tuple[Length, Fail]
+
+    for queue_size in (0, 2):
+        pipeline = FailingPipeline.resolve(queue_size=queue_size)
+        with pytest.raises(ValueError):
+            pipeline.run(["a", "bb", "ccc", "dddd"])
+
+    pipeline = TextPipeline.resolve(queue_size=1)
+    stream = pipeline.process(LINES * 1000)
+    assert next(stream) == 1
+    stream.close()
+    assert threading.active_count() == 1
+
+
+def test_nested():
+    class Double(Stage):
+        def process_item(self, item):
+            return item * 2
+
+    class Outer(Pipeline):
+        stages: Tuple[TextPipeline, Double]
+
+    pipeline = Outer.resolve(lowercase=True)
+    assert isinstance(pipeline.stages[0], Stage)
+    assert pipeline.stages[0].stages[0].lowercase
+    assert pipeline.run(LINES) == [2, 2, 4, 6, 8]
+
+
+class Square(Stage):
+    def process_item(self, item):
+        return item * item
+
+
+class Slow(Stage):
+    def __init__(self, executor: str = "inline", workers: int = 1, ordered: bool = True):
+        super().__init__(executor, workers, ordered)
+
+    def process_item(self, item):
+        # later items finish first
+        time.sleep(0.002 * (10 - item % 10))
+        return item
+
+
+class ParallelPipeline(Pipeline):
+    stages: Tuple[Square, Slow]
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parallel_stages(executor):
+    pipeline = ParallelPipeline.resolve(stages_0_executor=executor, stages_0_workers=2, stages_1_executor="thread",
+                                        stages_1_workers=4, batch_size=3)
+    assert pipeline.run(range(30)) == [i * i for i in range(30)]
+    assert pipeline.stats[0].items_out == 30 and pipeline.stats[1].batches_in == 10
+
+    pipeline = ParallelPipeline.resolve(stages_1_executor="thread", stages_1_workers=4, stages_1_ordered=False,
+                                        queue_size=2)
+    assert sorted(pipeline.run(range(20))) == [i * i for i in range(20)]
+
+
+def test_parallel_errors():
+    class FailingPipeline(Pipeline):
+        stages: Tuple[Square, Fail]
+
+    class ParallelFail(Fail):
+        def __init__(self, at: int = 9, executor: str = "thread", workers: int = 2):
+            super().__init__(at)
+            self.executor = executor
+            self.workers = workers
+
+    class ParallelFailingPipeline(Pipeline):
+        stages: Tuple[Square, ParallelFail]
+
+    with pytest.raises(ValueError):
+        ParallelFailingPipeline.resolve().run(range(100))
+    with pytest.raises(ValueError):
+        FailingPipeline.resolve(stages_0_executor="cluster").run(range(3))
+    assert threading.active_count() == 1
+
+
+class Record(Stage):
+    def __init__(self, label: str = "record"):
+        super().__init__(executor="thread", workers=2)
+        self.label = label
+
+    def process_item(self, item):
+        return threading.get_ident()
+
+
+class RecordAttributes(Record):
+    def __init__(self, label: str = "record"):
+        self.label = label
+        self.executor = "thread"
+
+
+class RecordInline(Record):
+    def __init__(self, label: str = "record"):
+        self.label = label
+
+
+@pytest.mark.parametrize("stage", [Record, RecordAttributes, RecordInline])
+def test_stage_with_own_init(stage):
+    class RecordPipeline(Pipeline):
+        stages: Tuple[stage]
+
+    idents = set(RecordPipeline.resolve().run(range(20)))
+    assert (threading.get_ident() in idents) == (stage is RecordInline)
+    # not a parameter of these stages
+    with pytest.raises(TypeError):
+        RecordPipeline.resolve(executor="process")
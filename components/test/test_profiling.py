@@ -0,0 +1,57 @@
+import os
+import pstats
+import time
+
+from components import Component
+from components.cli import CLI
+from components.profiling import component_times, profile_command, summary
+
+
+class Slow(Component):
+    def __init__(self, delay: float = 0.02):
+        time.sleep(delay)
+        self.delay = delay
+
+    def work(self):
+        time.sleep(self.delay)
+
+
+class Main(Component):
+    def __init__(self, slow: Slow):
+        self.slow = slow
+
+    def run(self):
+        self.slow.work()
+        self.slow.work()
+
+
+def test_profile_phases():
+    stats = profile_command(Main, {})
+    assert set(stats) == {'resolve', 'run'}
+
+    resolve_times = {t['name']: t for t in component_times(stats['resolve'])}
+    assert resolve_times['Slow']['cumtime'] >= 0.02
+    assert 'Main' in resolve_times
+
+    run_times = {t['name']: t for t in component_times(stats['run'])}
+    assert run_times['Slow']['calls'] == 2 and run_times['Slow']['cumtime'] >= 0.04
+    assert run_times['Main']['cumtime'] >= run_times['Slow']['cumtime']
+
+    text = summary(stats, top=5, sort='component')
+    assert "===== resolve =====" in text and "===== run =====" in text
+    assert "test_profiling.Slow" in text
+    assert "function calls" in summary(stats, top=5)
+
+
+def test_profile_cli(tmp_path, capsys):
+    cli = CLI()
+
+    class Cmd(Main, cli.Command):
+        pass
+
+    prefix = str(tmp_path / "cmd")
+    cli.run(["--profile", "--profile-output", prefix, "--profile-sort", "component", "Cmd", "--delay", "0"])
+    assert "test_profiling.Main" in capsys.readouterr().err
+    for phase in ('resolve', 'run'):
+        assert os.path.exists(f"{prefix}.{phase}.prof")
+        pstats.Stats(f"{prefix}.{phase}.prof")
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from components import Component
+from components.result_cache import ResultCache, cached_method, stable_key
+
+CALLS = []
+
+
+def make_source(directory, salt=""):
+    class Source(Component):
+        def __init__(self, size: int = 3):
+            self.size = size
+
+        @cached_method(directory, salt=salt)
+        def load_data(self, offset=0):
+            CALLS.append((self.size, offset))
+            return [offset + i for i in range(self.size)]
+
+    return Source
+
+
+def test_cached_method(tmp_path):
+    CALLS.clear()
+    Source = make_source(tmp_path)
+    assert Source.resolve().load_data() == [0, 1, 2]
+    assert Source.resolve().load_data() == [0, 1, 2]
+    assert CALLS == [(3, 0)]
+    # other configuration or arguments
+    assert Source.resolve(size=2).load_data() == [0, 1]
+    assert Source.resolve().load_data(offset=1) == [1, 2, 3]
+    assert len(CALLS) == 3
+    cache = Source.load_data.get_cache()
+    assert cache.hits == 1 and cache.misses == 3 and len(cache.entries()) == 3
+
+    # a new salt invalidates the results, a new class with the same configuration reuses them
+    make_source(tmp_path).resolve().load_data()
+    assert len(CALLS) == 3
+    make_source(tmp_path, salt="v2").resolve().load_data()
+    assert len(CALLS) == 4
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(tmp_path)
+    for index in range(4):
+        cache.put(f"key{index}", bytes(100))
+        path = tmp_path / f"key{index}.pkl"
+        os.utime(path, (time.time() - 100 + index, time.time() - 100 + index))
+    # use key0
+    assert cache.get("key0") == (True, bytes(100))
+    size = cache.size()
+    cache.evict(size // 2)
+    assert sorted(os.listdir(tmp_path)) == ["key0.pkl", "key3.pkl"]
+    assert cache.get("key1") == (False, None)
+
+
+def test_numpy_results(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    cache = ResultCache(tmp_path, mmap_bytes=1000)
+    cache.put("small", numpy.arange(10))
+    cache.put("large", numpy.arange(1000))
+    found, small = cache.get("small")
+    assert found and not isinstance(small, numpy.memmap)
+    found, large = cache.get("large")
+    assert isinstance(large, numpy.memmap) and not large.flags.writeable and large[999] == 999
+
+
+KEY_SCRIPT = """
+from components import Component
+from components.result_cache import ResultCache
+
+class Source(Component):
+    def __init__(self, tags: frozenset = frozenset({"a", "b", "c", "d"}), weights: dict = None):
+        self.tags = tags
+
+print(ResultCache.key(Source.resolve(weights={"x": 1, "y": 2}), "load", ({"p", "q", "r"},), {"mode": "fast"}))
+"""
+
+
+def test_key_stable_across_runs():
+    keys = set()
+    for seed in ("1", "2", "3"):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        output = subprocess.run([sys.executable, "-c", KEY_SCRIPT], env=env, stdout=subprocess.PIPE, check=True)
+        keys.add(output.stdout)
+    assert len(keys) == 1
+
+
+def test_unstable_arguments_not_cached(tmp_path):
+    assert stable_key({2, 1}) == stable_key({1, 2}) and stable_key((1,)) != stable_key([1])
+    with pytest.raises(TypeError):
+        stable_key(object())
+    with pytest.raises(TypeError):
+        stable_key(lambda: 1)
+
+    class Model(Component):
+        calls = 0
+
+        @cached_method(tmp_path)
+        def predict(self, data):
+            Model.calls += 1
+            return 1
+
+    model = Model.resolve()
+    marker = object()
+    model.predict(marker)
+    model.predict(marker)
+    assert Model.calls == 2 and model.predict.get_cache().entries() == []
+
+    with pytest.raises(ValueError):
+        cached_method(ResultCache(tmp_path), max_bytes=10)
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from components import Component
+from components.forkserver import ForkServer
+from components.shared_memory import SharedMemoryStore, active_store, output_key, shared_memory, shared_output
+
+pytestmark = pytest.mark.skipif(shared_memory is None, reason="shared memory requires Python 3.8")
+
+LOADS = []
+
+
+class Source(Component):
+    def __init__(self, size: int = 16):
+        self.size = size
+
+    @shared_output
+    def load_data(self):
+        LOADS.append(os.getpid())
+        return bytes(range(self.size))
+
+
+class Exp(Component):
+    def __init__(self, source: Source, offset: int = 0):
+        self.source = source
+        self.offset = offset
+
+    def run(self):
+        data = self.source.load_data()
+        return type(data).__name__, data[self.offset], list(LOADS)
+
+
+def test_store():
+    source = Source(size=4)
+    with SharedMemoryStore() as store:
+        assert active_store() is store
+        first = source.load_data()
+        key = output_key(source, "load_data")
+        name = store.descriptors[key][0]
+        view = source.load_data()
+        for data in (first, view):
+            assert isinstance(data, memoryview) and data.readonly and bytes(data) == bytes(range(4))
+        assert len(LOADS) == 1
+        # another configuration
+        assert Source(size=2).load_data() == bytes(range(2))
+        del first, view, data
+    assert active_store() is None
+    # the block was removed
+    with SharedMemoryStore.attach({key: (name, "bytes", 4, None, None)}) as worker_store:
+        with pytest.raises(FileNotFoundError):
+            worker_store.get(key)
+    LOADS.clear()
+
+
+def test_unpublished_output_in_worker():
+    with SharedMemoryStore.attach({}):
+        data = Source(size=3).load_data()
+        assert isinstance(data, memoryview) and data.readonly and bytes(data) == bytes(range(3))
+    assert Source(size=3).load_data() == bytes(range(3))
+    LOADS.clear()
+
+
+def test_forkserver_shared_memory():
+    with ForkServer(Exp, [Source], processes=2, shared_memory=True) as server:
+        store = server.store
+        assert len(store.descriptors) == 1
+        results = server.map([{'offset': 1}, {'offset': 2}])
+    assert results == [("memoryview", 1, [os.getpid()]), ("memoryview", 2, [os.getpid()])]
+    assert len(store.blocks) == 0 and active_store() is None
+    LOADS.clear()
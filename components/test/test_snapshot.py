@@ -0,0 +1,78 @@
+import enum
+import io
+import json
+import pathlib
+from typing import Tuple
+
+import pytest
+
+from components import Component
+from components import snapshot
+
+
+class Mode(enum.Enum):
+    FAST = 1
+    SLOW = 2
+
+
+class Leaf(Component):
+    def __init__(self, key: int = 1, mode: Mode = Mode.FAST, path: pathlib.Path = pathlib.Path("data")):
+        self.key = key
+        self.mode = mode
+        self.path = path
+
+
+class Root(Component):
+    def __init__(self, leaf: Leaf, items: Tuple[Leaf, Leaf], options: dict = None, sizes=(1, 2)):
+        self.leaf = leaf
+        self.items = items
+        self.options = options
+
+
+def test_round_trip():
+    obj = Root.resolve(leaf_key=3, items_1_mode=Mode.SLOW, options={'a': [1, (2, 3)], 4: None})
+    text = snapshot.dumps(obj)
+    lines = text.splitlines()
+    assert len(lines) == 1 + 4
+    root = json.loads(lines[-1])
+    assert root['class'] == "test_snapshot.Root"
+
+    loaded = snapshot.loads(text)
+    assert type(loaded) == Root and loaded is not obj
+    assert loaded.full_identifier == obj.full_identifier
+    assert loaded.get_params()['options'] == {'a': [1, (2, 3)], 4: None}
+    assert loaded.items[1].mode == Mode.SLOW and loaded.leaf.path == pathlib.Path("data")
+
+
+def test_shared_instances_and_streaming(tmp_path):
+    leaf = Leaf(key=5)
+    obj = Root(leaf=leaf, items=(leaf, Leaf()))
+    path = tmp_path / "snapshot.jsonl"
+    snapshot.save(obj, path)
+    loaded = snapshot.restore(path)
+    assert loaded.items[0] is loaded.leaf
+
+    with open(path) as f:
+        reader = snapshot.SnapshotReader(f)
+        assert [type(o) for o in reader] == [Leaf, Leaf, Root]
+
+
+def test_errors():
+    class Local(Component):
+        def __init__(self, value=object()):
+            self.value = value
+
+    with pytest.raises(TypeError):
+        snapshot.dumps(Local())
+
+    class Local(Component):
+        def __init__(self, value=1):
+            self.value = value
+
+    text = snapshot.dumps(Local())
+    with pytest.raises(ImportError):
+        snapshot.loads(text)
+    classes = {f"{Local.__module__}.{Local.__qualname__}": Local}
+    assert snapshot.loads(text, classes=classes).value == 1
+    with pytest.raises(ValueError):
+        snapshot.load(io.StringIO("{}\n"))
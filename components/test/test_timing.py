@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+from typing import Tuple
+
+from components import Component
+from components.hooks import active_observers
+from components.timing import ResolveTimer, timed_resolve
+
+
+class Slow(Component):
+    def __init__(self, delay: float = 0.02):
+        time.sleep(delay)
+        self.delay = delay
+
+
+class Fast(Component):
+    def __init__(self, key: int = 1):
+        self.key = key
+
+
+class Middle(Component):
+    def __init__(self, slow: Slow, fast: Fast):
+        self.slow = slow
+        self.fast = fast
+
+
+class Root(Component):
+    def __init__(self, middle: Middle, items: Tuple[Fast, Fast]):
+        self.middle = middle
+        self.items = items
+
+
+def test_timing_tree():
+    obj, tree = timed_resolve(Root)
+    assert isinstance(obj, Root)
+    assert tree.root.cls == Root and tree.root.path == ()
+    assert [child.path for child in tree.root.children] == [('middle',), ('items',)]
+    assert [child.path for child in tree['items'].children] == [('items', '0'), ('items', '1')]
+
+    slow = tree['middle.slow']
+    assert slow.cls == Slow
+    assert slow.own_wall >= 0.02 and slow.total_wall >= slow.own_wall
+    assert tree['middle'].total_wall >= slow.total_wall
+    assert tree['middle'].own_wall < 0.02
+    assert tree.root.total_wall >= tree['middle'].total_wall + tree['items'].total_wall
+
+    data = json.loads(tree.to_json())
+    assert data['tree']['children'][0]['children'][0]['path'] == "middle.slow"
+    assert "slow (Slow)" in str(tree)
+
+
+def test_timing_plan():
+    with ResolveTimer() as timer:
+        Root.resolve(delay=0)
+        Root.resolve(delay=0)
+    assert len(timer.trees) == 2
+    assert timer.trees[1].plan_cached
+    assert not active_observers()
+
+
+def test_timing_threads():
+    timer = ResolveTimer()
+    timer.install()
+    try:
+        threads = [threading.Thread(target=Root.resolve, kwargs={'delay': 0.01}) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        timer.uninstall()
+    assert len(timer.trees) == 4
+    for tree in timer.trees:
+        assert tree.root.cls == Root
+        assert [child.path for child in tree.root.children] == [('middle',), ('items',)]
+        assert [child.path for child in tree['middle'].children] == [('middle', 'slow'), ('middle', 'fast')]
+        assert tree['middle.slow'].own_wall >= 0.01
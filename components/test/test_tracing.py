@@ -0,0 +1,87 @@
+import json
+import pickle
+import threading
+
+from components import Component
+from components.tracing import Tracer
+
+
+class Source(Component):
+    def __init__(self, path: str = "data.txt"):
+        self.path = path
+
+    def load_data(self):
+        return [1, 2, 3]
+
+    @property
+    def size(self):
+        return 3
+
+
+class Model(Component):
+    def __init__(self, factor: int = 2):
+        self.factor = factor
+
+    def fit(self, x):
+        self.total_ = sum(x) * self.factor
+        return self
+
+    def predict(self, x):
+        return [self.total_ for _ in x]
+
+
+class Exp(Component):
+    def __init__(self, source: Source, model: Model):
+        self.source = source
+        self.model = model
+
+    def run(self):
+        data = self.source.load_data()
+        return self.model.fit(data).predict(data)
+
+
+def test_trace_resolve_events():
+    with Tracer() as tracer:
+        Exp.resolve()
+    names = [(e['name'], e['ph']) for e in tracer.events]
+    assert names[0] == ("resolve Exp", 'B') and names[-1] == ("resolve Exp", 'E')
+    assert ("Source.__init__", 'B') in names and ("Source.__init__", 'E') in names
+    assert names.index(("Model.__init__", 'E')) < names.index(("Exp.__init__", 'B'))
+    event = tracer.events[1]
+    assert event['args'] == {'path': "source"}
+    assert event['pid'] > 0 and event['tid'] == threading.get_ident()
+    assert all(e['cat'] != "method" for e in tracer.events)
+
+
+def test_trace_methods(tmp_path):
+    path = str(tmp_path / "trace.json")
+    with Tracer(path, methods=["fit", "predict", "load_data"], buffer_size=3):
+        exp = Exp.resolve()
+        assert exp.run() == [12, 12, 12]
+        assert exp.source.size == 3
+
+    with open(path) as f:
+        events = json.load(f)
+    methods = [(e['name'], e['ph']) for e in events if e['cat'] == "method"]
+    assert methods == [("Source.load_data", 'B'), ("Source.load_data", 'E'), ("Model.fit", 'B'), ("Model.fit", 'E'),
+                       ("Model.predict", 'B'), ("Model.predict", 'E')]
+    timestamps = [e['ts'] for e in events]
+    assert timestamps == sorted(timestamps)
+
+
+def test_trace_all_methods():
+    with Tracer(methods=True) as tracer:
+        Exp.resolve().run()
+    methods = {e['name'] for e in tracer.events if e['cat'] == "method"}
+    assert methods == {"Exp.run", "Source.load_data", "Model.fit", "Model.predict"}
+
+
+def test_trace_methods_removed_on_exit():
+    with Tracer(methods=True) as tracer:
+        exp = Exp.resolve()
+        assert "run" in vars(exp)
+    assert "run" not in vars(exp) and "fit" not in vars(exp.model)
+    count = len(tracer.events)
+    exp.run()
+    assert len(tracer.events) == count
+    pickle.loads(pickle.dumps(exp))
@@ -0,0 +1,130 @@
+import warnings
+from typing import List, Tuple
+
+import pytest
+
+from components import Component
+from components.param import ComponentParam
+from components.validation import ValidationReport, validation, set_validation_level, get_validation_level
+
+
+class SubComp(Component):
+    def __init__(self, key: int = 3, rate: float = 0.5, label: str = None):
+        self.key = key
+        self.rate = rate
+        self.label = label
+
+
+class Comp(Component):
+    def __init__(self, sub: SubComp, a):
+        self.sub = sub
+        self.a = a
+
+
+def test_validator_compiled():
+    plan = SubComp.get_plan()
+    assert all(param.validator is not None for param in plan)
+    key, rate, label = plan
+    assert key.validator(1) is None and key.validator("1") is not None
+    assert rate.validator(1) is None and rate.validator(1.5) is None
+    assert label.validator(None) is None and key.validator(None) is not None
+
+
+def test_strict():
+    with validation("strict"):
+        with pytest.raises(TypeError):
+            Comp.resolve(a=1, key="1")
+        with pytest.raises(TypeError):
+            Comp.resolve()
+        assert Comp.resolve(a=1, rate=1).sub.rate == 1
+    assert get_validation_level() == "warn"
+
+
+def test_off():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with validation("off"):
+            c = Comp.resolve(a=1, key="1")
+        assert c.sub.key == "1"
+
+    set_validation_level("off")
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            Comp.resolve(a=1, key="1")
+    finally:
+        set_validation_level("warn")
+
+    with pytest.raises(ValueError):
+        set_validation_level("loud")
+
+
+def test_report():
+    report = ValidationReport()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with validation(report=report):
+            Comp.resolve(a=1, key="1", rate="fast")
+            with pytest.raises(TypeError):
+                # `a` is missing
+                Comp.resolve(label="x")
+    assert [(d.component, d.path, d.parameter, d.kind) for d in report] == [
+        (SubComp, ('sub',), 'key', 'type'),
+        (SubComp, ('sub',), 'rate', 'type'),
+        (Comp, (), 'a', 'missing'),
+    ]
+    assert report.to_dict()[0]['path'] == "sub"
+    assert "expected type" in report.to_dict()[0]['message']
+
+
+class Heavy(Component):
+    def __init__(self, sub: SubComp, items: Tuple[SubComp, SubComp], size: int):
+        raise AssertionError("validate shouldn't construct components")
+
+
+def test_validate_without_construction():
+    report = Heavy.validate(size=3)
+    assert report.valid
+
+    report = Heavy.validate(size="3", sub_key=1, sub_rate="x", other=2)
+    assert [(d.path, d.parameter, d.kind) for d in report] == [
+        (('sub',), 'rate', 'type'),
+        ((), 'size', 'type'),
+        ((), 'other', 'unknown'),
+    ]
+    assert Heavy.validate_coerced(size="3").valid
+    # conversion errors are reported with the other problems
+    report = Heavy.validate_coerced(size="large", sub_rate="x", other=2)
+    assert [(d.path, d.parameter, d.kind) for d in report] == [
+        ((), 'size', 'type'),
+        ((), 'sub_rate', 'type'),
+        ((), 'other', 'unknown'),
+    ]
+
+    # files that can't be read are conversion errors as well
+    class Tagged(Component):
+        def __init__(self, tags: List[str] = ()):
+            self.tags = tags
+
+    report = Tagged.validate_coerced(tags="@/nonexistent/tags.txt")
+    assert [(d.parameter, d.kind) for d in report] == [('tags', 'type')]
+
+    report = Heavy.validate(size=1, items_0_key=1, items_0_label="a")
+    assert report.valid
+    assert [d.kind for d in Heavy.validate()] == ["missing"]
+    assert [d.kind for d in Comp.validate(a=1, sub_key=1, key=2)] == ["conflict"]
+
+
+def test_validate_all():
+    reports = Heavy.validate_all([{'size': 1}, {'size': None}, {}])
+    assert [report.valid for report in reports] == [True, False, False]
+
+
+def test_validate_plan_error(monkeypatch):
+    def fail(self):
+        raise AttributeError("No valid identifier for parameter size")
+
+    monkeypatch.setattr(ComponentParam, 'enforce_consistency', fail)
+    Component.clear_plan_cache()
+    report = Heavy.validate(size=1)
+    assert [(d.kind, d.message) for d in report] == [("error", "No valid identifier for parameter size")]
@@ -0,0 +1,155 @@
+"""
+Per-component timing of `resolve`: wall and CPU time of the construction of every component and of its subtree.
+"""
+import json
+import threading
+import time
+
+from components.hooks import ResolveObserver, format_path
+
+# CPU time of the current thread (process time for python < 3.7)
+_cpu_time = getattr(time, 'thread_time', time.process_time)
+
+
+class TimingNode(object):
+    """ Timings of one component in the resolved tree. Times are in seconds. """
+
+    def __init__(self, cls, path):
+        self.cls = cls
+        self.path = path
+        # construction of the component itself (`__init__`)
+        self.own_wall = 0.
+        self.own_cpu = 0.
+        # resolving the component including its subcomponents
+        self.total_wall = 0.
+        self.total_cpu = 0.
+        self.children = list()
+
+    @property
+    def name(self):
+        return format_path(self.path) or self.cls.__name__
+
+    def to_dict(self):
+        """ JSON compatible representation of this subtree. """
+        return {
+            'path': format_path(self.path),
+            'class': f"{self.cls.__module__}.{self.cls.__qualname__}",
+            'own_wall': self.own_wall,
+            'own_cpu': self.own_cpu,
+            'total_wall': self.total_wall,
+            'total_cpu': self.total_cpu,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+    def walk(self):
+        """ Yields all nodes of this subtree, depth first. """
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def format(self, indent=0):
+        """ Text representation of this subtree, one line per component. """
+        line = (f"{'  ' * indent}{self.path[-1] if self.path else self.cls.__name__} ({self.cls.__name__}): "
+                f"total {self.total_wall * 1000:.3f} ms (cpu {self.total_cpu * 1000:.3f} ms), "
+                f"own {self.own_wall * 1000:.3f} ms (cpu {self.own_cpu * 1000:.3f} ms)")
+        return "\n".join([line] + [child.format(indent + 1) for child in self.children])
+
+    def __str__(self):
+        return self.format()
+
+    def __repr__(self):
+        return f"TimingNode({self.name})"
+
+
+class TimingTree(object):
+    """ Result of a timed resolve: the plan build time and the tree of component timings. """
+
+    def __init__(self, plan_time=0., plan_cached=False, root=None):
+        self.plan_time = plan_time
+        self.plan_cached = plan_cached
+        self.root = root
+
+    def __getitem__(self, path):
+        """ Returns the node of the component at `path` (a tuple of names or a dotted string). """
+        if isinstance(path, str):
+            path = tuple(path.split('.')) if path else ()
+        for node in self.root.walk():
+            if node.path == path:
+                return node
+        raise KeyError(path)
+
+    def to_dict(self):
+        return {
+            'plan_time': self.plan_time,
+            'plan_cached': self.plan_cached,
+            'tree': None if self.root is None else self.root.to_dict(),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def __str__(self):
+        header = f"plan: {self.plan_time * 1000:.3f} ms{' (cached)' if self.plan_cached else ''}"
+        if self.root is None:
+            return header
+        return header + "\n" + self.root.format()
+
+
+class ResolveTimer(ResolveObserver):
+    """
+    Records a `TimingTree` per resolve while active:
+    `with ResolveTimer() as timer: Comp.resolve()`, then `print(timer.tree)`.
+    With `install()`, resolves in all threads are recorded, each in its own tree.
+    """
+
+    def __init__(self):
+        self.trees = list()
+        # stack of the components being resolved and the plan of the current resolve, per thread
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = list()
+        return stack
+
+    @property
+    def tree(self):
+        """ Timing tree of the last resolve. """
+        return self.trees[-1] if self.trees else None
+
+    def on_plan(self, cls, duration, cached):
+        self._local.plan = (duration, cached)
+
+    def on_enter(self, cls, path):
+        node = TimingNode(cls, path)
+        # node, start of resolve, start of construction
+        self._stack.append([node, (time.perf_counter(), _cpu_time()), None])
+
+    def on_construct(self, cls, path):
+        self._stack[-1][2] = (time.perf_counter(), _cpu_time())
+
+    def on_constructed(self, cls, path, obj):
+        wall, cpu = time.perf_counter(), _cpu_time()
+        node, _, (start_wall, start_cpu) = self._stack[-1]
+        node.own_wall = wall - start_wall
+        node.own_cpu = cpu - start_cpu
+
+    def on_exit(self, cls, path, obj):
+        stack = self._stack
+        node, (wall, cpu), _ = stack.pop()
+        node.total_wall = time.perf_counter() - wall
+        node.total_cpu = _cpu_time() - cpu
+        if stack:
+            stack[-1][0].children.append(node)
+        else:
+            self.trees.append(TimingTree(*getattr(self._local, 'plan', (0., False)), root=node))
+            self._local.plan = (0., False)
+
+
+def timed_resolve(cls, **params):
+    """ Resolves `cls` with `params` and returns the object and its `TimingTree`. """
+    with ResolveTimer() as timer:
+        obj = cls.resolve(**params)
+    return obj, timer.tree
@@ -0,0 +1,142 @@
+"""
+Timeline tracing of `resolve` and of method calls of components, written as Chrome trace JSON.
+The resulting file can be opened in Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import weakref
+
+from components.component import Component
+from components.hooks import ResolveObserver, format_path
+
+
+def _timestamp():
+    """ Microseconds on a monotonic, system-wide clock. """
+    return time.perf_counter_ns() / 1000 if hasattr(time, 'perf_counter_ns') else time.perf_counter() * 1e6
+
+
+class Tracer(ResolveObserver):
+    """
+    Records begin and end events of the resolve and construction of every component, with process and thread ids.
+    If `methods` is True (all public methods) or a collection of method names, calls to those methods of the
+    constructed components are traced as well, until the tracer exits.
+    Events are buffered and written in batches of `buffer_size` to `path` in the Chrome trace (JSON array) format.
+    The file is completed when the tracer exits. Without `path` (or after exiting), events are kept in `events`.
+    Use as context manager: `with Tracer("trace.json", methods=["fit", "predict"]): Experiment.resolve().run()`
+    """
+
+    def __init__(self, path=None, methods=(), buffer_size=10000):
+        self.path = path
+        self.methods = methods
+        self.buffer_size = buffer_size
+        self.events = list()
+        self._buffer = list()
+        self._lock = threading.Lock()
+        self._file = None
+        self._written = 0
+        # (weak reference to component, method name, wrapper) of the instrumented methods
+        self._instrumented = list()
+
+    def __enter__(self):
+        if self.path is not None and self._file is None:
+            self._file = open(self.path, "w")
+            self._file.write("[\n")
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        super().__exit__(exc_type, exc_val, exc_tb)
+        self.close()
+
+    def emit(self, name, category, phase, args=None):
+        """ Records an event. `phase` is 'B' (begin) or 'E' (end). """
+        event = {'name': name, 'cat': category, 'ph': phase, 'ts': _timestamp(),
+                 'pid': os.getpid(), 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        # list.append is atomic, flushing swaps the buffer under the lock
+        self._buffer.append(event)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """ Writes the buffered events. """
+        with self._lock:
+            events, self._buffer = self._buffer, list()
+            if self._file is None:
+                self.events += events
+            elif events:
+                prefix = ",\n" if self._written else ""
+                self._file.write(prefix + ",\n".join(json.dumps(event) for event in events))
+                self._file.flush()
+                self._written += len(events)
+
+    def close(self):
+        """ Removes the method wrappers, writes the remaining events and completes the trace file. """
+        self.uninstrument()
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.write("\n]\n")
+                self._file.close()
+                self._file = None
+
+    def on_enter(self, cls, path):
+        self.emit(f"resolve {cls.__name__}", "resolve", 'B', {'path': format_path(path)})
+
+    def on_construct(self, cls, path):
+        self.emit(f"{cls.__name__}.__init__", "construct", 'B', {'path': format_path(path)})
+
+    def on_constructed(self, cls, path, obj):
+        self.emit(f"{cls.__name__}.__init__", "construct", 'E')
+        if self.methods and isinstance(obj, Component):
+            self.instrument(obj, path)
+
+    def on_exit(self, cls, path, obj):
+        self.emit(f"resolve {cls.__name__}", "resolve", 'E')
+
+    def traced_methods(self, cls):
+        """ Names of the methods of `cls` whose calls are traced. """
+        names = list()
+        for name in dir(cls):
+            if name.startswith('_') or name in vars(Component):
+                continue
+            if not inspect.isfunction(getattr(cls, name, None)):
+                # skip properties, class and static methods
+                continue
+            if self.methods is True or name in self.methods:
+                names.append(name)
+        return names
+
+    def instrument(self, obj, path):
+        """ Traces calls to the public methods of `obj`, by wrapping them on the instance. """
+        for name in self.traced_methods(type(obj)):
+            if name in vars(obj):
+                # already instrumented
+                continue
+            wrapper = self._wrap(getattr(obj, name), f"{type(obj).__name__}.{name}", format_path(path))
+            setattr(obj, name, wrapper)
+            with self._lock:
+                self._instrumented.append((weakref.ref(obj), name, wrapper))
+
+    def uninstrument(self):
+        """ Removes the method wrappers from the instrumented components, so they can be pickled again. """
+        with self._lock:
+            instrumented, self._instrumented = self._instrumented, list()
+        for ref, name, wrapper in instrumented:
+            obj = ref()
+            if obj is not None and vars(obj).get(name) is wrapper:
+                delattr(obj, name)
+
+    def _wrap(self, method, name, path):
+        @functools.wraps(method)
+        def traced(*args, **kwargs):
+            self.emit(name, "method", 'B', {'path': path})
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.emit(name, "method", 'E')
+        return traced
@@ -0,0 +1,123 @@
+"""
+Validation of resolved parameter values.
+A validator is compiled per parameter into the resolution plan. The validation level determines what happens with
+problems: "strict" raises a TypeError, "warn" (default) emits a RuntimeWarning and "off" skips validation entirely.
+"""
+import collections
+import contextlib
+import threading
+
+from components import coercion
+
+STRICT = "strict"
+WARN = "warn"
+OFF = "off"
+LEVELS = (STRICT, WARN, OFF)
+
+_default_level = WARN
+_local = threading.local()
+
+
+def _check_level(level):
+    if level not in LEVELS:
+        raise ValueError(f"Unknown validation level {level!r}, expected one of {LEVELS}")
+
+
+def set_validation_level(level):
+    """ Sets the validation level of all threads (unless overridden with `validation`). """
+    global _default_level
+    _check_level(level)
+    _default_level = level
+
+
+def get_validation_level():
+    """ Returns the validation level that is active in this thread. """
+    return getattr(_local, 'level', None) or _default_level
+
+
+def active_report():
+    """ Returns the `ValidationReport` that is active in this thread or None. """
+    return getattr(_local, 'report', None)
+
+
+@contextlib.contextmanager
+def validation(level=None, report=None):
+    """
+    Sets the validation level in this thread for the duration of the `with` block.
+    With a `ValidationReport`, problems are collected in the report instead of emitting warnings.
+    `with validation("off"): Comp.resolve()`
+    """
+    if level is not None:
+        _check_level(level)
+    old_level, old_report = getattr(_local, 'level', None), active_report()
+    _local.level = level if level is not None else old_level
+    _local.report = report if report is not None else old_report
+    try:
+        yield report
+    finally:
+        _local.level, _local.report = old_level, old_report
+
+
+Diagnostic = collections.namedtuple('Diagnostic', ['component', 'path', 'parameter', 'kind', 'message'])
+Diagnostic.__doc__ = """
+A validation problem: `kind` is 'type' (type mismatch), 'missing' (no value) or, from `Component.validate`,
+'conflict' (value supplied under multiple aliases), 'unknown' (unused parameter) or 'error'.
+"""
+
+
+class ValidationReport(object):
+    """ Collection of validation diagnostics, see `validation`. """
+
+    def __init__(self):
+        self.diagnostics = list()
+
+    def add(self, diagnostic):
+        self.diagnostics.append(diagnostic)
+
+    def __iter__(self):
+        return iter(self.diagnostics)
+
+    def __len__(self):
+        return len(self.diagnostics)
+
+    def __bool__(self):
+        return len(self.diagnostics) > 0
+
+    @property
+    def valid(self):
+        """ Whether no problems were found. """
+        return not self.diagnostics
+
+    def to_dict(self):
+        """ JSON compatible list of the diagnostics. """
+        return [{
+            'component': f"{d.component.__module__}.{d.component.__qualname__}",
+            'path': ".".join(d.path),
+            'parameter': d.parameter,
+            'kind': d.kind,
+            'message': d.message,
+        } for d in self.diagnostics]
+
+
+def compile_validator(param):
+    """
+    Returns a function that checks a value for `param` and returns an error message or None if the value is valid.
+    Values of a different type are accepted if they are None and the default is None, or if they are an int for a
+    float parameter. Returns None if the parameter's type can't be checked.
+    """
+    # e.g. List[int]: check the origin type
+    tpe = coercion.runtime_type(param.type)
+    if tpe is None:
+        return None
+
+    allow_none = param.default is None
+    allow_int = tpe == float
+    expected = param.type
+    name = param.full_name
+
+    def validate(value):
+        if isinstance(value, tpe) or (allow_none and value is None) or (allow_int and type(value) == int):
+            return None
+        return f"Parameter '{name}' expected type {expected}, but got {type(value)} instead"
+
+    return validate